@@ -1,9 +1,12 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+import importlib.util
 import os
 import warnings
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 # Database configuration with smart fallback
 def get_database_url():
@@ -15,25 +18,21 @@ def get_database_url():
     if DATABASE_URL:
         # Check if it's a PostgreSQL URL
         if DATABASE_URL.startswith(('postgresql://', 'postgres://')):
-            try:
-                # Test if PostgreSQL dependencies are available
-                import psycopg2
+            # Probe for drivers without importing them (psycopg2 loads a C extension)
+            if importlib.util.find_spec("psycopg2") is not None:
                 print("✅ PostgreSQL driver (psycopg2) available")
                 return DATABASE_URL
-            except ImportError:
-                try:
-                    import asyncpg
-                    # Convert to asyncpg format if needed
-                    if DATABASE_URL.startswith('postgresql://'):
-                        DATABASE_URL = DATABASE_URL.replace('postgresql://', 'postgresql+asyncpg://')
-                    print("✅ PostgreSQL driver (asyncpg) available")
-                    return DATABASE_URL
-                except ImportError:
-                    warnings.warn(
-                        "PostgreSQL URL provided but no PostgreSQL drivers available. "
-                        "Falling back to SQLite. Install psycopg2-binary or asyncpg for PostgreSQL support."
-                    )
-                    return "sqlite:///./inventory.db"
+            if importlib.util.find_spec("asyncpg") is not None:
+                # Convert to asyncpg format if needed
+                if DATABASE_URL.startswith('postgresql://'):
+                    DATABASE_URL = DATABASE_URL.replace('postgresql://', 'postgresql+asyncpg://')
+                print("✅ PostgreSQL driver (asyncpg) available")
+                return DATABASE_URL
+            warnings.warn(
+                "PostgreSQL URL provided but no PostgreSQL drivers available. "
+                "Falling back to SQLite. Install psycopg2-binary or asyncpg for PostgreSQL support."
+            )
+            return "sqlite:///./inventory.db"
         else:
             return DATABASE_URL
     
@@ -41,33 +40,147 @@ def get_database_url():
     print("📁 Using SQLite database for development")
     return "sqlite:///./inventory.db"
 
+def is_sqlite_url(url) -> bool:
+    """
+    True for any SQLite URL, whatever the driver suffix (sqlite, sqlite+pysqlite, ...)
+    """
+    return make_url(url).get_backend_name() == "sqlite"
+
+def is_memory_sqlite_url(url) -> bool:
+    """
+    True for SQLite URLs whose database lives in memory rather than in a file
+    """
+    url = make_url(url)
+    return is_sqlite_url(url) and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+    )
+
+# A private :memory: database exists per connection, so the sync and async engines
+# would each see their own. Name it and use shared cache so both open the same one.
+SHARED_MEMORY_SQLITE_URL = "sqlite:///file:inventory?mode=memory&cache=shared&uri=true"
+
 DATABASE_URL = get_database_url()
+if is_memory_sqlite_url(DATABASE_URL):
+    DATABASE_URL = SHARED_MEMORY_SQLITE_URL
+
+# Seconds a request waits for a pooled connection before failing, rather than
+# queueing for SQLAlchemy's default 30s when the pool is exhausted
+POOL_TIMEOUT_SECONDS = int(os.getenv("SQLALCHEMY_POOL_TIMEOUT", "5"))
 
 # Create SQLAlchemy engine with appropriate settings
 def create_db_engine():
     """
     Create database engine with appropriate settings based on database type
     """
-    if DATABASE_URL.startswith('sqlite'):
+    if is_sqlite_url(DATABASE_URL):
         # SQLite-specific settings
+        if is_memory_sqlite_url(DATABASE_URL):
+            # In-memory databases live inside a single connection, so share it
+            return create_engine(
+                DATABASE_URL,
+                poolclass=StaticPool,
+                echo=False,
+                connect_args={"check_same_thread": False}
+            )
+        # One file means one writer at a time: keep the pool small and let
+        # WAL + busy_timeout serialize writers while readers run concurrently
         return create_engine(
             DATABASE_URL,
-            pool_pre_ping=True,
+            pool_size=5,
+            max_overflow=5,
+            pool_timeout=POOL_TIMEOUT_SECONDS,
+            # No pool_pre_ping: local file connections never go stale
             echo=False,  # Set to True for SQL query logging in development
             connect_args={"check_same_thread": False}  # Required for SQLite
         )
     else:
-        # PostgreSQL settings
+        # PostgreSQL settings (tunable per deployment)
         return create_engine(
             DATABASE_URL,
-            pool_size=20,
-            max_overflow=0,
+            pool_size=int(os.getenv("SQLALCHEMY_POOL_SIZE", "30")),
+            max_overflow=int(os.getenv("SQLALCHEMY_MAX_OVERFLOW", "30")),
+            pool_timeout=POOL_TIMEOUT_SECONDS,
             pool_pre_ping=True,
-            pool_recycle=300,
+            pool_recycle=int(os.getenv("SQLALCHEMY_POOL_RECYCLE", "3600")),
+            pool_use_lifo=True,  # Reuse the most recently returned (warm) connection
             echo=False  # Set to True for SQL query logging in development
         )
 
+# SQLite tuning applied to every new DBAPI connection
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",  # Readers no longer block behind writers
+    "PRAGMA synchronous=NORMAL",  # Safe with WAL, avoids an fsync per commit
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256 MB memory-mapped I/O
+    "PRAGMA busy_timeout=5000",  # Wait for locks instead of raising "database is locked"
+    "PRAGMA cache_size=-64000",  # ~64 MB page cache
+    "PRAGMA foreign_keys=ON",
+)
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Apply performance PRAGMAs whenever the pool opens a new SQLite connection
+    """
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+def _apply_sqlite_tuning(engine):
+    """
+    Install the PRAGMA hook when the engine talks to SQLite (no-op otherwise)
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    event.listen(engine, "connect", set_sqlite_pragmas)
+
 engine = create_db_engine()
+_apply_sqlite_tuning(engine)
+
+# Async engine for handlers that run entirely on the event loop
+def get_async_database_url(url: str):
+    """
+    Map the configured database URL onto its asyncio driver
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    if backend in ("postgresql", "postgres"):
+        return url.set(drivername="postgresql+asyncpg")
+    return url
+
+ASYNC_DATABASE_URL = get_async_database_url(DATABASE_URL)
+
+def create_async_db_engine():
+    """
+    Create the asyncio engine with the same pool policy as the sync engine
+    """
+    if is_sqlite_url(ASYNC_DATABASE_URL):
+        if is_memory_sqlite_url(ASYNC_DATABASE_URL):
+            return create_async_engine(ASYNC_DATABASE_URL, poolclass=StaticPool, echo=False)
+        return create_async_engine(
+            ASYNC_DATABASE_URL,
+            poolclass=AsyncAdaptedQueuePool,  # aiosqlite defaults to NullPool
+            pool_size=5,
+            max_overflow=5,
+            pool_timeout=POOL_TIMEOUT_SECONDS,
+            echo=False
+        )
+    else:
+        return create_async_engine(
+            ASYNC_DATABASE_URL,
+            pool_size=int(os.getenv("SQLALCHEMY_POOL_SIZE", "30")),
+            max_overflow=int(os.getenv("SQLALCHEMY_MAX_OVERFLOW", "30")),
+            pool_timeout=POOL_TIMEOUT_SECONDS,
+            pool_pre_ping=True,
+            pool_recycle=int(os.getenv("SQLALCHEMY_POOL_RECYCLE", "3600")),
+            pool_use_lifo=True,
+            echo=False
+        )
+
+async_engine = create_async_db_engine()
+_apply_sqlite_tuning(async_engine.sync_engine)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(
@@ -87,6 +200,32 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+# Async session factory (no expiry on commit: attributes stay readable without I/O)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Async database dependency for FastAPI
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency function to get an asyncio database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Refresh SQLite query planner statistics
+def optimize_database():
+    """
+    Run PRAGMA optimize so SQLite keeps its sqlite_stat tables fresh
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect() as conn:
+        conn.execute(text("PRAGMA optimize"))
+
 # Test database connection
 def test_db_connection():
     """
@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 """
 Database Migration Script
-Adds missing columns to the suppliers table for purchase order functionality
+Adds missing columns to the suppliers table for purchase order functionality,
+creates the indexes declared on the models, rebuilds supplier_products
+on its natural key and seeds the order number counters for existing databases
 """
 
 import sqlite3
@@ -9,7 +11,7 @@ import os
 from datetime import datetime
 
 def migrate_database():
-    """Add missing columns to suppliers table"""
+    """Add missing columns to suppliers table and ensure model indexes exist"""
     
     # Database path
     db_path = os.path.join(os.path.dirname(__file__), "data", "inventory.db")
@@ -22,6 +24,10 @@ def migrate_database():
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
+        # Switch to WAL (persists in the database file, so the app inherits it)
+        cursor.execute("PRAGMA journal_mode=WAL;")
+        cursor.execute("PRAGMA synchronous=NORMAL;")
+        
         # Check if suppliers table exists
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='suppliers';")
         if not cursor.fetchone():
@@ -30,35 +36,151 @@ def migrate_database():
         
         # Get current table schema
         cursor.execute("PRAGMA table_info(suppliers);")
-        existing_columns = [column[1] for column in cursor.fetchall()]
+        existing_info = cursor.fetchall()
+        existing_columns = [column[1] for column in existing_info]
         print(f"📋 Existing columns: {existing_columns}")
         
-        # Define the columns we need to add
-        new_columns = [
-            ("company_name", "TEXT"),
-            ("payment_terms", "TEXT DEFAULT 'Net 30'"),
+        # Final suppliers schema (mirrors models.product.Supplier)
+        suppliers_schema = [
+            ("id", "VARCHAR(36) NOT NULL PRIMARY KEY"),
+            ("name", "VARCHAR(255) NOT NULL"),
+            ("company_name", "VARCHAR(255)"),
+            ("contact_person", "VARCHAR(255)"),
+            ("email", "VARCHAR(255)"),
+            ("phone", "VARCHAR(50)"),
+            ("address", "TEXT"),
+            ("tax_id", "VARCHAR(50)"),
+            ("payment_terms", "VARCHAR(100) DEFAULT 'Net 30'"),
             ("lead_time_days", "INTEGER DEFAULT 7"),
-            ("minimum_order_value", "REAL DEFAULT 0.0"),
-            ("rating", "REAL DEFAULT 0.0"),
+            ("minimum_order_value", "FLOAT DEFAULT 0.0"),
+            ("rating", "FLOAT DEFAULT 0.0"),
             ("total_orders", "INTEGER DEFAULT 0"),
-            ("on_time_delivery_rate", "REAL DEFAULT 0.0"),
+            ("on_time_delivery_rate", "FLOAT DEFAULT 0.0"),
+            ("is_active", "BOOLEAN DEFAULT 1"),
             ("is_preferred", "BOOLEAN DEFAULT 0"),
+            ("created_at", "DATETIME"),
+            ("updated_at", "DATETIME"),
+        ]
+        known_columns = {name for name, _ in suppliers_schema}
+        # Keep any extra columns an older schema may carry so the rebuild loses nothing
+        suppliers_schema += [
+            (column[1], column[2]) for column in existing_info if column[1] not in known_columns
         ]
+        missing_columns = [name for name, _ in suppliers_schema if name not in existing_columns]
         
-        # Add missing columns
+        # Define the indexes the models declare on hot filter/join columns
+        new_indexes = [
+            ("ix_products_supplier_id", "products", "supplier_id"),
+            ("ix_products_is_active", "products", "is_active"),
+            ("ix_products_cat_sub_active", "products", "category, subcategory, is_active"),
+            ("ix_inventory_transactions_product_id", "inventory_transactions", "product_id"),
+            ("ix_purchase_orders_supplier_id", "purchase_orders", "supplier_id"),
+            ("ix_purchase_orders_status", "purchase_orders", "status"),
+            ("ix_po_supplier_status", "purchase_orders", "supplier_id, status"),
+            ("ix_po_status_created", "purchase_orders", "status, created_at"),
+            ("ix_po_supplier_created", "purchase_orders", "supplier_id, created_at"),
+            ("ix_products_reorder", "products", "quantity_in_stock",
+             "quantity_in_stock <= min_stock_threshold AND is_active = 1"),
+            ("ix_products_stock_status", "products", "quantity_in_stock, min_stock_threshold",
+             "is_active = 1"),
+            ("ix_purchase_order_items_purchase_order_id", "purchase_order_items", "purchase_order_id"),
+            ("ix_delivery_tracking_status", "delivery_tracking", "status"),
+            ("ix_delivery_tracking_delivered", "delivery_tracking", "actual_delivery_date",
+             "status = 'DELIVERED'"),
+        ]
+        
+        # Rebuild the table in one transaction instead of one ALTER TABLE per column:
+        # create the final schema, copy rows across (new columns take their defaults),
+        # then swap the tables
         columns_added = 0
-        for column_name, column_type in new_columns:
-            if column_name not in existing_columns:
-                try:
-                    sql = f"ALTER TABLE suppliers ADD COLUMN {column_name} {column_type};"
-                    cursor.execute(sql)
+        cursor.execute("BEGIN IMMEDIATE;")
+        try:
+            if missing_columns:
+                column_defs = ",\n    ".join(f"{name} {ddl}" for name, ddl in suppliers_schema)
+                cursor.execute(f"CREATE TABLE suppliers_new (\n    {column_defs}\n);")
+                
+                copied_columns = ", ".join(
+                    name for name, _ in suppliers_schema if name in existing_columns
+                )
+                cursor.execute(
+                    f"INSERT INTO suppliers_new ({copied_columns}) SELECT {copied_columns} FROM suppliers;"
+                )
+                cursor.execute("DROP TABLE suppliers;")
+                cursor.execute("ALTER TABLE suppliers_new RENAME TO suppliers;")
+                
+                for column_name in missing_columns:
                     print(f"✅ Added column: {column_name}")
-                    columns_added += 1
-                except sqlite3.Error as e:
-                    print(f"❌ Error adding column {column_name}: {e}")
-        
-        # Commit changes
-        conn.commit()
+                columns_added = len(missing_columns)
+            
+            # Add indexes on hot filter/join columns (tables created by the app may be missing)
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+            existing_tables = {row[0] for row in cursor.fetchall()}
+            indexes_added = 0
+            for index_name, table_name, columns, *where in new_indexes:
+                if table_name in existing_tables:
+                    # An optional fourth element makes it a partial index
+                    where_clause = f" WHERE {where[0]}" if where else ""
+                    cursor.execute(
+                        f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns}){where_clause};"
+                    )
+                    indexes_added += 1
+            print(f"✅ Ensured {indexes_added} indexes")
+            
+            # supplier_products dropped its surrogate id for a (product_id, supplier_id)
+            # key stored WITHOUT ROWID; rebuild old copies, keeping one row per pair
+            if "supplier_products" in existing_tables:
+                cursor.execute("PRAGMA table_info(supplier_products);")
+                if "id" in [column[1] for column in cursor.fetchall()]:
+                    link_columns = (
+                        "supplier_id, product_id, supplier_sku, supplier_price, minimum_order_quantity, "
+                        "lead_time_days, is_preferred, is_available, last_order_date, last_price_update"
+                    )
+                    cursor.execute("""
+                        CREATE TABLE supplier_products_new (
+                            supplier_id VARCHAR(36) NOT NULL REFERENCES suppliers (id),
+                            product_id VARCHAR(36) NOT NULL REFERENCES products (id),
+                            supplier_sku VARCHAR(100),
+                            supplier_price FLOAT NOT NULL,
+                            minimum_order_quantity INTEGER,
+                            lead_time_days INTEGER,
+                            is_preferred BOOLEAN,
+                            is_available BOOLEAN,
+                            last_order_date DATETIME,
+                            last_price_update DATETIME,
+                            PRIMARY KEY (product_id, supplier_id)
+                        ) WITHOUT ROWID;
+                    """)
+                    cursor.execute(
+                        f"INSERT OR IGNORE INTO supplier_products_new ({link_columns}) "
+                        f"SELECT {link_columns} FROM supplier_products;"
+                    )
+                    cursor.execute("DROP TABLE supplier_products;")
+                    cursor.execute("ALTER TABLE supplier_products_new RENAME TO supplier_products;")
+                    print("✅ Rebuilt supplier_products without rowid")
+            
+            # Order numbers come from a per-day counter; start it from the orders
+            # already numbered so the next number issued today does not collide
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS purchase_order_counters (
+                    day VARCHAR(8) NOT NULL PRIMARY KEY,
+                    last INTEGER NOT NULL
+                );
+            """)
+            if "purchase_orders" in existing_tables:
+                cursor.execute("""
+                    INSERT INTO purchase_order_counters (day, last)
+                    SELECT strftime('%Y%m%d', created_at), COUNT(*) FROM purchase_orders
+                    WHERE created_at IS NOT NULL
+                    GROUP BY 1
+                    ON CONFLICT (day) DO UPDATE SET last = max(last, excluded.last);
+                """)
+                print("✅ Seeded purchase order number counters")
+            
+            # Commit changes
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
         
         # Verify the migration
         cursor.execute("PRAGMA table_info(suppliers);")
@@ -0,0 +1,4 @@
+# Single declarative Base shared by every model; importing the modules here
+# registers all tables on one MetaData so create_all runs once.
+from .product import Base
+from . import product, purchase_order, user
@@ -1,117 +1,191 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy import DDL, case, text, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, Index, event
+from sqlalchemy.orm import DeclarativeBase, Mapped, column_property, mapped_column, relationship
+from sqlalchemy.sql import func
 from datetime import datetime
+from typing import List, Optional
+import os
+import time
 import uuid
 
-Base = declarative_base()
+class Base(DeclarativeBase):
+    pass
+
+def generate_id() -> str:
+    """
+    Primary key default shared by all models (36-char UUID string).
+    
+    A UUIDv7 (RFC 9562): 48-bit Unix milliseconds, then random bits. IDs sort by
+    creation time, so primary key inserts land on the right edge of the B-tree
+    instead of a random leaf page, while the format stays a valid UUID.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = value & ~(0xF << 76) | (0x7 << 76)  # version 7
+    value = value & ~(0x3 << 62) | (0x2 << 62)  # RFC 4122 variant
+    return str(uuid.UUID(int=value))
+
+# Timestamps are SQL expressions (rendered inline as now()/CURRENT_TIMESTAMP), so
+# inserts never call back into Python per row and executemany stays batched.
+# server_default covers rows written outside the ORM on freshly created tables.
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_cat_sub_active", "category", "subcategory", "is_active"),
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    name = Column(String(255), nullable=False)
-    description = Column(Text)
-    barcode = Column(String(50), unique=True, nullable=True)
-    sku = Column(String(50), unique=True, nullable=False)
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=generate_id)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    barcode: Mapped[Optional[str]] = mapped_column(String(50), unique=True, nullable=True)
+    sku: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
     
     # Category and Classification
-    category = Column(String(100), nullable=False)
-    subcategory = Column(String(100), nullable=True)
-    brand = Column(String(100), nullable=True)
+    category: Mapped[str] = mapped_column(String(100), nullable=False)
+    subcategory: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    brand: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     
     # Pricing
-    cost_price = Column(Float, nullable=False, default=0.0)
-    selling_price = Column(Float, nullable=False, default=0.0)
+    cost_price: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    selling_price: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
     
     # Inventory Tracking
-    quantity_in_stock = Column(Integer, nullable=False, default=0)
-    min_stock_threshold = Column(Integer, nullable=False, default=10)
-    max_stock_threshold = Column(Integer, nullable=True, default=1000)
+    quantity_in_stock: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    min_stock_threshold: Mapped[int] = mapped_column(Integer, nullable=False, default=10)
+    max_stock_threshold: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, default=1000)
     
     # Location Information
-    aisle = Column(String(20), nullable=True)
-    shelf = Column(String(20), nullable=True)
-    bin_location = Column(String(20), nullable=True)
-    warehouse_id = Column(String, nullable=True)  # For multi-warehouse support
+    aisle: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    shelf: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    bin_location: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    warehouse_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # For multi-warehouse support
     
     # Product Details
-    unit_of_measure = Column(String(20), nullable=False, default="pieces")  # pieces, kg, liters, etc.
-    weight = Column(Float, nullable=True)  # in grams
-    dimensions = Column(String(100), nullable=True)  # "L x W x H"
+    unit_of_measure: Mapped[str] = mapped_column(String(20), nullable=False, default="pieces")  # pieces, kg, liters, etc.
+    weight: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # in grams
+    dimensions: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)  # "L x W x H"
     
     # Perishable Items
-    is_perishable = Column(Boolean, default=False)
-    expiry_date = Column(DateTime, nullable=True)
-    days_until_expiry_warning = Column(Integer, default=7)
+    is_perishable: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    expiry_date: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    days_until_expiry_warning: Mapped[Optional[int]] = mapped_column(Integer, default=7)
     
     # Supplier Information
-    supplier_id = Column(String, ForeignKey("suppliers.id"), nullable=True)
-    supplier_sku = Column(String(100), nullable=True)
+    supplier_id: Mapped[Optional[str]] = mapped_column(String(36), ForeignKey("suppliers.id"), nullable=True, index=True)
+    supplier_sku: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     
     # Status and Metadata
-    is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    created_by = Column(String, nullable=True)  # User ID
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True, index=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now(), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now())
+    created_by: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # User ID
+    
+    # Stock flags, computed by the database in the same SELECT that loads the row
+    is_out_of_stock: Mapped[bool] = column_property(quantity_in_stock <= 0)
+    is_low_stock: Mapped[bool] = column_property(quantity_in_stock <= min_stock_threshold)
+    stock_status: Mapped[str] = column_property(case(
+        (quantity_in_stock <= 0, "OUT_OF_STOCK"),
+        (quantity_in_stock <= min_stock_threshold, "LOW_STOCK"),
+        (quantity_in_stock >= func.coalesce(max_stock_threshold, 2147483647), "OVERSTOCK"),
+        else_="NORMAL"
+    ))
     
     # Relationships
-    supplier = relationship("Supplier", back_populates="products")
-    inventory_transactions = relationship("InventoryTransaction", back_populates="product")
+    supplier: Mapped[Optional["Supplier"]] = relationship("Supplier", back_populates="products")
+    inventory_transactions: Mapped[List["InventoryTransaction"]] = relationship("InventoryTransaction", back_populates="product")
     
     def __repr__(self):
         return f"<Product(id={self.id}, name={self.name}, stock={self.quantity_in_stock})>"
-    
-    @property
-    def is_low_stock(self):
-        return self.quantity_in_stock <= self.min_stock_threshold
-    
-    @property
-    def is_out_of_stock(self):
-        return self.quantity_in_stock <= 0
-    
-    @property
-    def stock_status(self):
-        if self.is_out_of_stock:
-            return "OUT_OF_STOCK"
-        elif self.is_low_stock:
-            return "LOW_STOCK"
-        elif self.quantity_in_stock >= self.max_stock_threshold:
-            return "OVERSTOCK"
-        else:
-            return "NORMAL"
+
+
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+# Trigram indexes let PostgreSQL serve the ILIKE '%term%' code search and filters
+# without a scan (name and description go through the full-text index below).
+# Listings only ever read active products, so the indexes are partial and skip
+# soft-deleted rows.
+for _column in (
+    Product.sku, Product.barcode,
+    Product.category, Product.subcategory, Product.brand, Product.aisle
+):
+    Index(
+        f"ix_products_{_column.key}_trgm", _column,
+        postgresql_using="gin",
+        postgresql_ops={_column.key: "gin_trgm_ops"},
+        postgresql_where=Product.is_active == True
+    ).ddl_if(dialect="postgresql")
+del _column
+
+# Full-text document for the product search box on PostgreSQL: name and description
+# as English lexemes. The GIN index is on this exact expression, so queries must
+# reuse PRODUCT_SEARCH_VECTOR for the planner to match it; the constants are
+# inline SQL rather than bound parameters for the same reason.
+PRODUCT_SEARCH_CONFIG = text("'english'")
+PRODUCT_SEARCH_VECTOR = func.to_tsvector(
+    PRODUCT_SEARCH_CONFIG,
+    func.coalesce(Product.name, text("''"))
+    .op("||")(text("' '"))
+    .op("||")(func.coalesce(Product.description, text("''")))
+)
+Index(
+    "ix_products_search_fts", PRODUCT_SEARCH_VECTOR,
+    postgresql_using="gin",
+    postgresql_where=Product.is_active == True
+).ddl_if(dialect="postgresql")
+
+# Stock-level lookups (low stock, out of stock, dashboard counts) over active
+# products: both compared columns live in the index, so the predicate is checked
+# without visiting the table
+ACTIVE_PRODUCT = Product.is_active == True
+Index(
+    "ix_products_stock_status", Product.quantity_in_stock, Product.min_stock_threshold,
+    sqlite_where=ACTIVE_PRODUCT,
+    postgresql_where=ACTIVE_PRODUCT
+)
+
+# Partial index over reorder candidates only (active, at or below threshold), keyed
+# by stock so the reorder suggestions read the most depleted products first
+REORDER_CANDIDATE = (Product.quantity_in_stock <= Product.min_stock_threshold) & (Product.is_active == True)
+Index(
+    "ix_products_reorder", Product.quantity_in_stock,
+    sqlite_where=REORDER_CANDIDATE,
+    postgresql_where=REORDER_CANDIDATE
+)
 
 
 class Supplier(Base):
     __tablename__ = "suppliers"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    name = Column(String(255), nullable=False)
-    company_name = Column(String(255), nullable=True)
-    contact_person = Column(String(255), nullable=True)
-    email = Column(String(255), nullable=True)
-    phone = Column(String(50), nullable=True)
-    address = Column(Text, nullable=True)
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=generate_id)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    company_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    contact_person: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    email: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    phone: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    address: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
     # Business Details
-    tax_id = Column(String(50), nullable=True)
-    payment_terms = Column(String(100), nullable=True, default="Net 30")
-    lead_time_days = Column(Integer, default=7)
-    minimum_order_value = Column(Float, default=0.0)
+    tax_id: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    payment_terms: Mapped[Optional[str]] = mapped_column(String(100), nullable=True, default="Net 30")
+    lead_time_days: Mapped[Optional[int]] = mapped_column(Integer, default=7)
+    minimum_order_value: Mapped[Optional[float]] = mapped_column(Float, default=0.0)
     
     # Rating and Performance
-    rating = Column(Float, default=0.0)  # 0-5 stars
-    total_orders = Column(Integer, default=0)
-    on_time_delivery_rate = Column(Float, default=0.0)  # percentage
+    rating: Mapped[Optional[float]] = mapped_column(Float, default=0.0)  # 0-5 stars
+    total_orders: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    on_time_delivery_rate: Mapped[Optional[float]] = mapped_column(Float, default=0.0)  # percentage
     
     # Status
-    is_active = Column(Boolean, default=True)
-    is_preferred = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
+    is_preferred: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now(), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now())
     
     # Relationships
-    products = relationship("Product", back_populates="supplier")
+    products: Mapped[List["Product"]] = relationship("Product", back_populates="supplier")
     
     def __repr__(self):
         return f"<Supplier(id={self.id}, name={self.name})>"
@@ -120,33 +194,33 @@ class Supplier(Base):
 class InventoryTransaction(Base):
     __tablename__ = "inventory_transactions"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    product_id = Column(String, ForeignKey("products.id"), nullable=False)
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=generate_id)
+    product_id: Mapped[str] = mapped_column(String(36), ForeignKey("products.id"), nullable=False, index=True)
     
     # Transaction Details
-    transaction_type = Column(String(20), nullable=False)  # IN, OUT, ADJUSTMENT, TRANSFER
-    quantity = Column(Integer, nullable=False)
-    unit_cost = Column(Float, nullable=True)  # Cost per unit for IN transactions
+    transaction_type: Mapped[str] = mapped_column(String(20), nullable=False)  # IN, OUT, ADJUSTMENT, TRANSFER
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    unit_cost: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # Cost per unit for IN transactions
     
     # Reference Information
-    reference_type = Column(String(50), nullable=True)  # PURCHASE_ORDER, SALE, MANUAL, RETURN
-    reference_id = Column(String, nullable=True)  # ID of related document
+    reference_type: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)  # PURCHASE_ORDER, SALE, MANUAL, RETURN
+    reference_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # ID of related document
     
     # Location (for transfers)
-    from_location = Column(String(100), nullable=True)
-    to_location = Column(String(100), nullable=True)
+    from_location: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    to_location: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     
     # Batch/Lot Information
-    batch_number = Column(String(100), nullable=True)
-    expiry_date = Column(DateTime, nullable=True)
+    batch_number: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    expiry_date: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     
     # Metadata
-    notes = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    created_by = Column(String, nullable=False)  # User ID
+    notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now(), server_default=func.now())
+    created_by: Mapped[str] = mapped_column(String, nullable=False)  # User ID
     
     # Relationships
-    product = relationship("Product", back_populates="inventory_transactions")
+    product: Mapped["Product"] = relationship("Product", back_populates="inventory_transactions")
     
     def __repr__(self):
         return f"<InventoryTransaction(id={self.id}, type={self.transaction_type}, qty={self.quantity})>" 
\ No newline at end of file
@@ -1,11 +1,11 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, Index, PrimaryKeyConstraint, text
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime
-import uuid
 import enum
-from .product import Base
+from .product import Base, generate_id
 
-class PurchaseOrderStatus(enum.Enum):
+# Status columns are stored as plain strings; these enums validate them in Python
+class PurchaseOrderStatus(str, enum.Enum):
     DRAFT = "DRAFT"
     PENDING = "PENDING"
     APPROVED = "APPROVED"
@@ -14,7 +14,7 @@ class PurchaseOrderStatus(enum.Enum):
     DELIVERED = "DELIVERED"
     CANCELLED = "CANCELLED"
 
-class DeliveryStatus(enum.Enum):
+class DeliveryStatus(str, enum.Enum):
     PENDING = "PENDING"
     PICKED_UP = "PICKED_UP"
     IN_TRANSIT = "IN_TRANSIT"
@@ -24,10 +24,16 @@ class DeliveryStatus(enum.Enum):
 
 class SupplierProduct(Base):
     __tablename__ = "supplier_products"
+    # Pure link table: the natural key is the PK and, without a rowid, rows live
+    # directly in the PK B-tree. product_id leads so per-product supplier lookups
+    # use the key prefix.
+    __table_args__ = (
+        PrimaryKeyConstraint("product_id", "supplier_id"),
+        {"sqlite_with_rowid": False},
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    supplier_id = Column(String, ForeignKey("suppliers.id"), nullable=False)
-    product_id = Column(String, ForeignKey("products.id"), nullable=False)
+    supplier_id = Column(String(36), ForeignKey("suppliers.id"), nullable=False)
+    product_id = Column(String(36), ForeignKey("products.id"), nullable=False)
     
     # Supplier-specific product details
     supplier_sku = Column(String(100), nullable=True)
@@ -47,12 +53,12 @@ class SupplierProduct(Base):
 class PurchaseOrder(Base):
     __tablename__ = "purchase_orders"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String(36), primary_key=True, default=generate_id)
     order_number = Column(String(50), unique=True, nullable=False)
-    supplier_id = Column(String, ForeignKey("suppliers.id"), nullable=False)
+    supplier_id = Column(String(36), ForeignKey("suppliers.id"), nullable=False, index=True)
     
     # Order Details
-    status = Column(Enum(PurchaseOrderStatus), default=PurchaseOrderStatus.DRAFT)
+    status = Column(String(20), default=PurchaseOrderStatus.DRAFT.value, index=True)
     order_date = Column(DateTime, default=datetime.utcnow)
     expected_delivery_date = Column(DateTime, nullable=True)
     actual_delivery_date = Column(DateTime, nullable=True)
@@ -85,15 +91,36 @@ class PurchaseOrder(Base):
     delivery_tracking = relationship("DeliveryTracking", back_populates="purchase_order", uselist=False)
     supplier = relationship("Supplier", foreign_keys=[supplier_id])
     
+    __table_args__ = (
+        Index("ix_po_supplier_status", "supplier_id", "status"),
+        # Listing filters by status or supplier and pages newest first
+        Index("ix_po_status_created", "status", "created_at"),
+        Index("ix_po_supplier_created", "supplier_id", "created_at"),
+    )
+    
+    @validates("status")
+    def validate_status(self, key, value):
+        return PurchaseOrderStatus(value).value
+    
     def __repr__(self):
         return f"<PurchaseOrder(id={self.id}, order_number={self.order_number}, status={self.status})>"
 
+class PurchaseOrderCounter(Base):
+    """Last order number sequence issued per day, bumped with an upsert"""
+    __tablename__ = "purchase_order_counters"
+    
+    day = Column(String(8), primary_key=True)  # YYYYMMDD, as in the order number
+    last = Column(Integer, nullable=False)
+    
+    def __repr__(self):
+        return f"<PurchaseOrderCounter(day={self.day}, last={self.last})>"
+
 class PurchaseOrderItem(Base):
     __tablename__ = "purchase_order_items"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    purchase_order_id = Column(String, ForeignKey("purchase_orders.id"), nullable=False)
-    product_id = Column(String, ForeignKey("products.id"), nullable=False)
+    id = Column(String(36), primary_key=True, default=generate_id)
+    purchase_order_id = Column(String(36), ForeignKey("purchase_orders.id"), nullable=False, index=True)
+    product_id = Column(String(36), ForeignKey("products.id"), nullable=False)
     
     # Order Item Details
     quantity_ordered = Column(Integer, nullable=False)
@@ -120,14 +147,24 @@ class PurchaseOrderItem(Base):
 
 class DeliveryTracking(Base):
     __tablename__ = "delivery_tracking"
-    
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    purchase_order_id = Column(String, ForeignKey("purchase_orders.id"), nullable=False)
+    # Dashboard counts read the few in-flight rows by status and today's
+    # deliveries by date, instead of scanning the whole delivery history
+    __table_args__ = (
+        Index("ix_delivery_tracking_status", "status"),
+        Index(
+            "ix_delivery_tracking_delivered", "actual_delivery_date",
+            sqlite_where=text("status = 'DELIVERED'"),
+            postgresql_where=text("status = 'DELIVERED'")
+        ),
+    )
+    
+    id = Column(String(36), primary_key=True, default=generate_id)
+    purchase_order_id = Column(String(36), ForeignKey("purchase_orders.id"), nullable=False)
     
     # Tracking Details
     tracking_number = Column(String(100), nullable=True)
     carrier = Column(String(100), nullable=True)  # FedEx, UPS, DHL, etc.
-    status = Column(Enum(DeliveryStatus), default=DeliveryStatus.PENDING)
+    status = Column(String(20), default=DeliveryStatus.PENDING.value)
     
     # Timeline
     shipped_date = Column(DateTime, nullable=True)
@@ -147,7 +184,7 @@ class DeliveryTracking(Base):
     
     # Status Updates
     last_status_update = Column(DateTime, default=datetime.utcnow)
-    status_history = Column(Text, nullable=True)  # JSON string of status updates
+    status_history = Column(Text, nullable=True)  # Legacy JSON blob, read-only; see DeliveryStatusEvent
     
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -155,6 +192,28 @@ class DeliveryTracking(Base):
     
     # Relationships
     purchase_order = relationship("PurchaseOrder", back_populates="delivery_tracking")
+    events = relationship("DeliveryStatusEvent", order_by="DeliveryStatusEvent.created_at")
+    
+    @validates("status")
+    def validate_status(self, key, value):
+        return DeliveryStatus(value).value
+    
+    def __repr__(self):
+        return f"<DeliveryTracking(id={self.id}, tracking_number={self.tracking_number}, status={self.status})>"
+
+class DeliveryStatusEvent(Base):
+    """Append-only status history for a delivery (one small row per change)"""
+    __tablename__ = "delivery_status_events"
+    
+    id = Column(String(36), primary_key=True, default=generate_id)
+    tracking_id = Column(String(36), ForeignKey("delivery_tracking.id"), nullable=False, index=True)
+    status = Column(String(20), nullable=False)
+    location = Column(String(255), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    @validates("status")
+    def validate_status(self, key, value):
+        return DeliveryStatus(value).value
     
     def __repr__(self):
-        return f"<DeliveryTracking(id={self.id}, tracking_number={self.tracking_number}, status={self.status})>" 
\ No newline at end of file
+        return f"<DeliveryStatusEvent(tracking_id={self.tracking_id}, status={self.status})>"
@@ -1,8 +1,10 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
 
+from .schemas import EmailAddress, MessageResponse
+
 # Enums
 class PurchaseOrderStatus(str, Enum):
     DRAFT = "DRAFT"
@@ -26,7 +28,7 @@ class SupplierBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
     company_name: Optional[str] = Field(None, max_length=255)
     contact_person: Optional[str] = Field(None, max_length=255)
-    email: Optional[str] = Field(None, max_length=255)
+    email: Optional[EmailAddress] = None
     phone: Optional[str] = Field(None, max_length=50)
     address: Optional[str] = None
     payment_terms: Optional[str] = Field("Net 30", max_length=100)
@@ -38,6 +40,7 @@ class SupplierCreate(SupplierBase):
 
 class SupplierResponse(SupplierBase):
     id: str
+    email: Optional[str] = None  # stored rows may predate email validation
     rating: float
     total_orders: int
     on_time_delivery_rate: float
@@ -46,8 +49,7 @@ class SupplierResponse(SupplierBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Supplier Product Schemas
 class SupplierProductBase(BaseModel):
@@ -62,14 +64,12 @@ class SupplierProductCreate(SupplierProductBase):
     pass
 
 class SupplierProductResponse(SupplierProductBase):
-    id: str
     is_preferred: bool
     is_available: bool
     last_order_date: Optional[datetime]
     last_price_update: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Purchase Order Item Schemas
 class PurchaseOrderItemBase(BaseModel):
@@ -92,8 +92,7 @@ class PurchaseOrderItemResponse(PurchaseOrderItemBase):
     quality_notes: Optional[str]
     received_date: Optional[datetime]
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Purchase Order Schemas
 class PurchaseOrderBase(BaseModel):
@@ -139,9 +138,7 @@ class PurchaseOrderResponse(PurchaseOrderBase):
     supplier: SupplierResponse
     items: List[PurchaseOrderItemResponse] = Field(alias="order_items")
     
-    class Config:
-        from_attributes = True
-        populate_by_name = True
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
         
     @classmethod
     def from_orm(cls, obj):
@@ -200,6 +197,13 @@ class DeliveryTrackingUpdate(BaseModel):
     delivery_photo_url: Optional[str] = None
     delivery_notes: Optional[str] = None
 
+class DeliveryStatusEventResponse(BaseModel):
+    status: DeliveryStatus
+    location: Optional[str]
+    created_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
 class DeliveryTrackingResponse(DeliveryTrackingBase):
     id: str
     purchase_order_id: str
@@ -211,11 +215,11 @@ class DeliveryTrackingResponse(DeliveryTrackingBase):
     delivery_notes: Optional[str]
     last_status_update: datetime
     status_history: Optional[str]
+    events: List[DeliveryStatusEventResponse] = []
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Dashboard/Summary Schemas
 class PurchaseOrderSummary(BaseModel):
@@ -232,9 +236,38 @@ class DeliveryMetrics(BaseModel):
     delayed_deliveries: int
     average_delivery_time: float  # in days
 
+class PurchaseDashboard(BaseModel):
+    orders: PurchaseOrderSummary
+    deliveries: DeliveryMetrics
+    active_suppliers: List[SupplierResponse]
+
 # Receive Items Schema
 class ReceiveItemsRequest(BaseModel):
     items: List[dict] = Field(..., description="List of items with quantities received")
     # Example: [{"item_id": "123", "quantity_received": 10, "quality_notes": "Good condition"}]
     received_by: str
-    notes: Optional[str] = None 
\ No newline at end of file
+    notes: Optional[str] = None
+
+class ReceiveItemsResponse(MessageResponse):
+    items_processed: int
+
+# Reorder Suggestion Schemas
+class ReorderSupplier(BaseModel):
+    id: str
+    name: str
+    price: float
+    minimum_order: int
+    lead_time: int
+
+class ReorderSuggestion(BaseModel):
+    product_id: str
+    product_name: str
+    product_sku: str
+    current_stock: int
+    min_threshold: int
+    suggested_quantity: int
+    supplier: Optional[ReorderSupplier] = None
+
+class ReorderSuggestionsResponse(BaseModel):
+    suggestions: List[ReorderSuggestion]
+    total_count: int 
\ No newline at end of file
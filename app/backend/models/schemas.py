@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, validator
-from typing import Optional, List, Union, Annotated
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints, model_validator
+from typing import Optional, List, Annotated
 from datetime import datetime
 from enum import Enum
 
@@ -22,8 +22,17 @@ class StockStatus(str, Enum):
     NORMAL = "NORMAL"
     OVERSTOCK = "OVERSTOCK"
 
+# Email addresses are checked by a pattern compiled into the core schema
+EmailAddress = Annotated[str, StringConstraints(
+    strip_whitespace=True,
+    max_length=255,
+    pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+)]
+
 # Product Schemas
 class ProductBase(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+    
     name: str = Field(..., min_length=1, max_length=255, description="Product name")
     description: Optional[str] = Field(None, description="Product description")
     barcode: Optional[str] = Field(None, max_length=50, description="Product barcode")
@@ -48,42 +57,42 @@ class ProductBase(BaseModel):
     supplier_id: Optional[str] = Field(None, description="Supplier identifier")
     supplier_sku: Optional[str] = Field(None, max_length=100, description="Supplier's SKU for this product")
 
-    @validator('max_stock_threshold')
-    def validate_max_threshold(cls, v, values):
-        if v is not None and 'min_stock_threshold' in values:
-            if v <= values['min_stock_threshold']:
-                raise ValueError('max_stock_threshold must be greater than min_stock_threshold')
-        return v
+    @model_validator(mode='after')
+    def validate_max_threshold(self):
+        if self.max_stock_threshold is not None and self.max_stock_threshold <= self.min_stock_threshold:
+            raise ValueError('max_stock_threshold must be greater than min_stock_threshold')
+        return self
 
 class ProductCreate(ProductBase):
     quantity_in_stock: int = Field(default=0, ge=0, description="Initial stock quantity")
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "name": "Organic Whole Milk 1L",
-                "description": "Fresh organic whole milk from local farms",
-                "sku": "MILK-ORG-001",
-                "barcode": "1234567890123",
-                "category": "Dairy",
-                "subcategory": "Milk",
-                "brand": "FreshFarm",
-                "cost_price": 1.20,
-                "selling_price": 2.50,
-                "quantity_in_stock": 50,
-                "min_stock_threshold": 10,
-                "max_stock_threshold": 100,
-                "aisle": "A1",
-                "shelf": "S2",
-                "bin_location": "B3",
-                "unit_of_measure": "liters",
-                "weight": 1.0,
-                "is_perishable": True,
-                "days_until_expiry_warning": 3
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "name": "Organic Whole Milk 1L",
+            "description": "Fresh organic whole milk from local farms",
+            "sku": "MILK-ORG-001",
+            "barcode": "1234567890123",
+            "category": "Dairy",
+            "subcategory": "Milk",
+            "brand": "FreshFarm",
+            "cost_price": 1.20,
+            "selling_price": 2.50,
+            "quantity_in_stock": 50,
+            "min_stock_threshold": 10,
+            "max_stock_threshold": 100,
+            "aisle": "A1",
+            "shelf": "S2",
+            "bin_location": "B3",
+            "unit_of_measure": "liters",
+            "weight": 1.0,
+            "is_perishable": True,
+            "days_until_expiry_warning": 3
         }
+    })
 
 class ProductUpdate(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+    
     name: Optional[str] = Field(None, min_length=1, max_length=255)
     description: Optional[str] = None
     barcode: Optional[str] = Field(None, max_length=50)
@@ -119,14 +128,18 @@ class ProductResponse(ProductBase):
     is_low_stock: bool
     is_out_of_stock: bool
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+    @model_validator(mode='after')
+    def validate_max_threshold(self):
+        # Describes stored rows, so the input-side threshold check does not apply
+        return self
 
 # Supplier Schemas
 class SupplierBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
     contact_person: Optional[str] = Field(None, max_length=255)
-    email: Optional[str] = Field(None, max_length=255)
+    email: Optional[EmailAddress] = None
     phone: Optional[str] = Field(None, max_length=50)
     address: Optional[str] = None
     tax_id: Optional[str] = Field(None, max_length=50)
@@ -138,7 +151,7 @@ class SupplierCreate(SupplierBase):
 class SupplierUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=255)
     contact_person: Optional[str] = Field(None, max_length=255)
-    email: Optional[str] = Field(None, max_length=255)
+    email: Optional[EmailAddress] = None
     phone: Optional[str] = Field(None, max_length=50)
     address: Optional[str] = None
     tax_id: Optional[str] = Field(None, max_length=50)
@@ -147,12 +160,12 @@ class SupplierUpdate(BaseModel):
 
 class SupplierResponse(SupplierBase):
     id: str
+    email: Optional[str] = None  # stored rows may predate email validation
     is_active: bool
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Inventory Transaction Schemas
 class InventoryTransactionBase(BaseModel):
@@ -176,8 +189,7 @@ class InventoryTransactionResponse(InventoryTransactionBase):
     created_at: datetime
     created_by: str
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Stock Adjustment Schema
 class StockAdjustment(BaseModel):
@@ -240,7 +252,7 @@ class ErrorResponse(BaseModel):
 
 # Authentication Schemas
 class LoginRequest(BaseModel):
-    email: str = Field(..., min_length=1)
+    email: EmailAddress
     password: str = Field(..., min_length=1)
 
 class LoginResponse(BaseModel):
@@ -250,12 +262,12 @@ class LoginResponse(BaseModel):
     email: str
 
 class SignupRequest(BaseModel):
-    email: str = Field(..., min_length=1)
+    email: EmailAddress
     password: str = Field(..., min_length=6)
-    confirm_password: str = Field(..., min_length=6)
+    confirm_password: str
 
-    @validator('confirm_password')
-    def passwords_match(cls, v, values):
-        if 'password' in values and v != values['password']:
+    @model_validator(mode='after')
+    def passwords_match(self):
+        if self.confirm_password != self.password:
             raise ValueError('Passwords do not match')
-        return v 
\ No newline at end of file
+        return self 
\ No newline at end of file
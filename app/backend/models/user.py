@@ -1,14 +1,12 @@
-from sqlalchemy import Column, String, DateTime, Boolean
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, String, DateTime, Boolean, CheckConstraint
 from datetime import datetime
-import uuid
 
-Base = declarative_base()
+from .product import Base, generate_id
 
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String, primary_key=True, default=generate_id)
     email = Column(String(255), unique=True, index=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
     is_active = Column(Boolean, default=True)
@@ -16,5 +14,10 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Emails are stored normalized, so lookups are plain equality on ix_users_email
+        CheckConstraint("email = lower(email)", name="ck_users_email_normalized"),
+    )
+    
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email})>" 
\ No newline at end of file
@@ -4,6 +4,15 @@ from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from typing import Optional
+from collections import OrderedDict
+import base64
+import calendar
+import hashlib
+import hmac
+import os
+import time
+import anyio
+import orjson
 
 from database.connection import get_db
 from models.schemas import LoginRequest, LoginResponse, SignupRequest, MessageResponse
@@ -12,9 +21,18 @@ from services.user_service import UserService
 router = APIRouter()
 security = HTTPBearer()
 
-SECRET_KEY = "your-secret-key-change-in-production"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# JWT settings, read once at import
+SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
+ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MINUTES", "30"))
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+# HS256 signing state built once: the header segment never changes, and copying a
+# keyed HMAC skips re-deriving the padded key on every token
+_JWT_HEADER_B64 = _b64url(orjson.dumps({"alg": "HS256", "typ": "JWT"}))
+_HS256_HMAC = hmac.new(SECRET_KEY.encode(), digestmod=hashlib.sha256)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -23,8 +41,63 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    if ALGORITHM != "HS256":
+        return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    
+    to_encode["exp"] = calendar.timegm(expire.utctimetuple())
+    signing_input = _JWT_HEADER_B64 + b"." + _b64url(orjson.dumps(to_encode))
+    mac = _HS256_HMAC.copy()
+    mac.update(signing_input)
+    return (signing_input + b"." + _b64url(mac.digest())).decode("ascii")
+
+# Verified tokens: token -> (cache expiry, payload, user snapshot or None).
+# Entries live at most TOKEN_CACHE_TTL_SECONDS and never past the token's own
+# exp, so a deactivated user loses access within that window.
+TOKEN_CACHE_TTL_SECONDS = 60
+TOKEN_CACHE_MAXSIZE = 10_000
+_token_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+def _get_cached_token(token: str) -> Optional[tuple]:
+    entry = _token_cache.get(token)
+    if entry is None:
+        return None
+    if entry[0] <= time.time():
+        _token_cache.pop(token, None)
+        return None
+    # Least recently used entries are evicted first, so a hit refreshes its position
+    _token_cache.move_to_end(token)
+    return entry
+
+def _cache_token(token: str, payload: dict, user: Optional[dict] = None):
+    expires_at = min(time.time() + TOKEN_CACHE_TTL_SECONDS, payload.get("exp", float("inf")))
+    _token_cache[token] = (expires_at, payload, user)
+    _token_cache.move_to_end(token)
+    if len(_token_cache) > TOKEN_CACHE_MAXSIZE:
+        _token_cache.popitem(last=False)
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verify a JWT, reusing the result of a recent verification of the same token.
+    Raises JWTError for invalid or expired tokens (which are never cached).
+    """
+    entry = _get_cached_token(token)
+    if entry is not None:
+        return entry[1]
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    _cache_token(token, payload)
+    return payload
+
+# Argon2 is CPU- and memory-bound and releases the GIL, so hashes run in worker
+# threads, at most one per core: a burst of logins queues here instead of
+# oversubscribing the CPU and the shared threadpool. Created on first use because
+# a limiter belongs to the running event loop.
+_password_hash_limiter: Optional[anyio.CapacityLimiter] = None
+
+def _get_password_hash_limiter() -> anyio.CapacityLimiter:
+    global _password_hash_limiter
+    if _password_hash_limiter is None:
+        _password_hash_limiter = anyio.CapacityLimiter(os.cpu_count() or 1)
+    return _password_hash_limiter
 
 @router.post("/login", response_model=LoginResponse)
 async def login(request: LoginRequest, db: Session = Depends(get_db)):
@@ -33,8 +106,12 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
     """
     user_service = UserService(db)
     
-    # Authenticate user with database
-    user = user_service.authenticate_user(request.email, request.password)
+    # Authenticate user with database (Argon2 verify runs in a worker thread,
+    # keeping the event loop free for other requests)
+    user = await anyio.to_thread.run_sync(
+        user_service.authenticate_user, request.email, request.password,
+        limiter=_get_password_hash_limiter()
+    )
     
     if not user:
         raise HTTPException(
@@ -63,10 +140,10 @@ async def signup(request: SignupRequest, db: Session = Depends(get_db)):
     user_service = UserService(db)
     
     try:
-        # Create user in database with hashed password
-        user = user_service.create_user(
-            email=request.email,
-            password=request.password
+        # Create user in database with hashed password (hashing off the event loop)
+        user = await anyio.to_thread.run_sync(
+            user_service.create_user, request.email, request.password,
+            limiter=_get_password_hash_limiter()
         )
         
         return MessageResponse(
@@ -93,7 +170,12 @@ async def get_current_user(
     Get current authenticated user from database
     """
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        token = credentials.credentials
+        entry = _get_cached_token(token)
+        if entry is not None and entry[2] is not None:
+            return entry[2]
+        
+        payload = decode_access_token(token)
         email: str = payload.get("sub")
         user_id: str = payload.get("user_id")
         
@@ -106,13 +188,15 @@ async def get_current_user(
         
         if not user or not user.is_active:
             raise HTTPException(status_code=401, detail="User account not found or inactive")
-            
-        return {
+        
+        user_snapshot = {
             "user_id": user.id, 
             "email": user.email,
             "is_admin": user.is_admin,
             "created_at": user.created_at
         }
+        _cache_token(token, payload, user_snapshot)
+        return user_snapshot
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
@@ -123,12 +207,11 @@ async def create_admin_user(db: Session = Depends(get_db)):
     """
     user_service = UserService(db)
     
-    try:
-        admin = user_service.create_default_admin()
+    admin, created = user_service.create_default_admin()
+    if created:
         return MessageResponse(
             message=f"Admin user created: {admin.email}"
         )
-    except ValueError:
-        return MessageResponse(
-            message="Admin user already exists"
-        ) 
\ No newline at end of file
+    return MessageResponse(
+        message="Admin user already exists"
+    ) 
\ No newline at end of file
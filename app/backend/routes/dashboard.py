@@ -1,37 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from database.connection import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from models.schemas import DashboardMetrics, LowStockResponse
-from services.product_service import ProductService
+from routes.http_cache import cached_json_response
+from services.product_service import ProductService, get_product_service
 
 router = APIRouter()
 
 @router.get("/metrics", response_model=DashboardMetrics)
-async def get_dashboard_metrics(db: Session = Depends(get_db)):
+async def get_dashboard_metrics(request: Request, service: ProductService = Depends(get_product_service)):
     """
     Get dashboard metrics for the main dashboard page
     """
     try:
-        service = ProductService(db)
-        
-        # Get counts
-        all_products, total_products = service.get_products_paginated(page=1, per_page=1)
-        low_stock_products = service.get_low_stock_products()
-        out_of_stock_products = service.get_out_of_stock_products()
-        expiring_products = service.get_expiring_products(days=7)
-        
-        # Calculate total inventory value
-        all_products_full, _ = service.get_products_paginated(page=1, per_page=10000)  # Get all for value calc
-        total_value = sum(p.quantity_in_stock * p.cost_price for p in all_products_full)
-        
-        return DashboardMetrics(
+        # Counts and total inventory value, aggregated in the database
+        (
+            total_products,
+            low_stock_count,
+            out_of_stock_count,
+            expiring_soon_count,
+            total_value
+        ) = service.get_inventory_stats(expiry_days=7)
+
+        metrics = DashboardMetrics(
             total_products=total_products,
-            low_stock_count=len(low_stock_products),
-            out_of_stock_count=len(out_of_stock_products),
-            expiring_soon_count=len(expiring_products),
+            low_stock_count=low_stock_count,
+            out_of_stock_count=out_of_stock_count,
+            expiring_soon_count=expiring_soon_count,
             total_value=total_value
         )
-        
+        return cached_json_response(request, metrics.model_dump())
+
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -39,12 +36,11 @@ async def get_dashboard_metrics(db: Session = Depends(get_db)):
         )
 
 @router.get("/low-stock", response_model=LowStockResponse)
-async def get_low_stock_items(db: Session = Depends(get_db)):
+async def get_low_stock_items(service: ProductService = Depends(get_product_service)):
     """
     Get detailed list of low stock items
     """
     try:
-        service = ProductService(db)
         low_stock_products = service.get_low_stock_products()
         
         items = []
@@ -0,0 +1,34 @@
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+from typing import Any
+import hashlib
+
+# Clients keep the body but revalidate with If-None-Match on every use (no-cache):
+# the frontend refetches right after its own writes, so even a few seconds of
+# max-age would show stale data, while an unchanged body still costs only a 304.
+# Responses sit behind bearer auth, so shared caches must not store them.
+DEFAULT_MAX_AGE = 0
+
+def make_etag(body: bytes) -> str:
+    """
+    Build a strong ETag from an encoded response body
+    """
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def cached_json_response(request: Request, content: Any, max_age: int = DEFAULT_MAX_AGE) -> Response:
+    """
+    Encode content once and tag it with an ETag derived from the bytes. A client
+    that already holds that ETag gets an empty 304 Not Modified instead.
+    max_age=0 sends no-cache: the client keeps the body but revalidates every use.
+    """
+    response = ORJSONResponse(content)
+    etag = make_etag(response.body)
+    cache_control = f"private, max-age={max_age}" if max_age else "private, no-cache"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return response
@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
-import math
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from typing import AbstractSet, Iterator, Optional
+import orjson
 
-from database.connection import get_db
 from models.product import Product
 from models.schemas import (
     ProductCreate, 
@@ -12,32 +12,52 @@ from models.schemas import (
     ProductListResponse,
     ProductFilter,
     StockAdjustment,
+    StockStatus,
     MessageResponse
 )
-from services.product_service import ProductService
+from routes.http_cache import cached_json_response
+from services.product_service import COMPACT_LIST_EXCLUDED_FIELDS, ProductService, get_product_service
 
 router = APIRouter()
 
+# Encodes a ProductResponse straight to JSON bytes in pydantic-core (no dict step)
+PRODUCT_ADAPTER = TypeAdapter(ProductResponse)
+
+def _stream_product_list(
+    products: Iterator[ProductResponse],
+    metadata: dict,
+    exclude: Optional[AbstractSet[str]] = None
+) -> Iterator[bytes]:
+    """
+    Emit a ProductListResponse body one product at a time, so a page is never
+    held in memory as rows, dicts and encoded bytes all at once
+    """
+    yield b'{"products":['
+    for index, product in enumerate(products):
+        if index:
+            yield b","
+        yield PRODUCT_ADAPTER.dump_json(product, exclude=exclude)
+    # metadata is a JSON object; splice its members in after the array
+    yield b"]," + orjson.dumps(metadata)[1:]
+
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product: ProductCreate,
-    db: Session = Depends(get_db)
+    service: ProductService = Depends(get_product_service)
 ):
     """
     Create a new product in the inventory
     """
     try:
-        service = ProductService(db)
-        
         # Check if SKU already exists
-        if service.get_product_by_sku(product.sku):
+        if service.sku_exists(product.sku):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Product with SKU '{product.sku}' already exists"
             )
         
         # Check if barcode already exists (if provided)
-        if product.barcode and service.get_product_by_barcode(product.barcode):
+        if product.barcode and service.barcode_exists(product.barcode):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Product with barcode '{product.barcode}' already exists"
@@ -52,6 +72,9 @@ async def create_product(
             detail=f"Failed to create product: {str(e)}"
         )
 
+# Hot read endpoints return a Response directly: the service already built
+# ProductResponse objects, so FastAPI's response_model re-validation is skipped
+# (response_model stays for the OpenAPI schema)
 @router.get("/", response_model=ProductListResponse)
 async def get_products(
     page: int = Query(1, ge=1, description="Page number"),
@@ -62,17 +85,17 @@ async def get_products(
     supplier_id: Optional[str] = Query(None, description="Filter by supplier"),
     warehouse_id: Optional[str] = Query(None, description="Filter by warehouse"),
     is_perishable: Optional[bool] = Query(None, description="Filter by perishable status"),
-    stock_status: Optional[str] = Query(None, description="Filter by stock status"),
+    stock_status: Optional[StockStatus] = Query(None, description="Filter by stock status"),
     aisle: Optional[str] = Query(None, description="Filter by aisle"),
     search: Optional[str] = Query(None, description="Search in name, description, barcode, SKU"),
-    db: Session = Depends(get_db)
+    after_id: Optional[str] = Query(None, description="Keyset cursor: id of the last product on the previous page"),
+    compact: bool = Query(False, description="Omit description and dimensions from each product"),
+    service: ProductService = Depends(get_product_service)
 ):
     """
     Get paginated list of products with optional filtering and search
     """
     try:
-        service = ProductService(db)
-        
         # Create filter object
         filters = ProductFilter(
             category=category,
@@ -89,17 +112,21 @@ async def get_products(
         products, total_count = service.get_products_paginated(
             page=page,
             per_page=per_page,
-            filters=filters
+            filters=filters,
+            after_id=after_id,
+            compact=compact
         )
         
-        total_pages = math.ceil(total_count / per_page)
+        total_pages = (total_count + per_page - 1) // per_page
         
-        return ProductListResponse(
-            products=products,
-            total_count=total_count,
-            page=page,
-            per_page=per_page,
-            total_pages=total_pages
+        return StreamingResponse(
+            _stream_product_list(products, {
+                "total_count": total_count,
+                "page": page,
+                "per_page": per_page,
+                "total_pages": total_pages
+            }, exclude=COMPACT_LIST_EXCLUDED_FIELDS if compact else None),
+            media_type="application/json"
         )
         
     except Exception as e:
@@ -111,12 +138,12 @@ async def get_products(
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(
     product_id: str,
-    db: Session = Depends(get_db)
+    request: Request,
+    service: ProductService = Depends(get_product_service)
 ):
     """
     Get a specific product by ID
     """
-    service = ProductService(db)
     product = service.get_product(product_id)
     
     if not product:
@@ -125,39 +152,33 @@ async def get_product(
             detail=f"Product with ID '{product_id}' not found"
         )
     
-    return product
+    return cached_json_response(request, product.model_dump())
 
 @router.put("/{product_id}", response_model=ProductResponse)
 async def update_product(
     product_id: str,
     product_update: ProductUpdate,
-    db: Session = Depends(get_db)
+    service: ProductService = Depends(get_product_service)
 ):
     """
     Update a product's information
     """
     try:
-        service = ProductService(db)
-        
-        # Check if product exists
-        existing_product = service.get_product(product_id)
-        if not existing_product:
+        # The update itself reports a missing product (404) before a duplicate
+        # barcode (400), which only an existing product can collide on
+        updated_product = service.update_product(product_id, product_update)
+        if not updated_product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Product with ID '{product_id}' not found"
             )
-        
-        # Check for duplicate barcode if updating barcode
-        if product_update.barcode and product_update.barcode != existing_product.barcode:
-            if service.get_product_by_barcode(product_update.barcode):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Product with barcode '{product_update.barcode}' already exists"
-                )
-        
-        updated_product = service.update_product(product_id, product_update)
         return updated_product
         
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -169,21 +190,18 @@ async def update_product(
 @router.delete("/{product_id}", response_model=MessageResponse)
 async def delete_product(
     product_id: str,
-    db: Session = Depends(get_db)
+    service: ProductService = Depends(get_product_service)
 ):
     """
     Delete a product (soft delete - marks as inactive)
     """
     try:
-        service = ProductService(db)
-        
-        if not service.get_product(product_id):
+        if not service.delete_product(product_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Product with ID '{product_id}' not found"
             )
         
-        service.delete_product(product_id)
         return MessageResponse(message=f"Product '{product_id}' deleted successfully")
         
     except HTTPException:
@@ -198,20 +216,12 @@ async def delete_product(
 async def adjust_stock(
     product_id: str,
     adjustment: StockAdjustment,
-    db: Session = Depends(get_db)
+    service: ProductService = Depends(get_product_service)
 ):
     """
     Adjust product stock quantity
     """
     try:
-        service = ProductService(db)
-        
-        if not service.get_product(product_id):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Product with ID '{product_id}' not found"
-            )
-        
         updated_product = service.adjust_stock(
             product_id, 
             adjustment.new_quantity, 
@@ -219,6 +229,11 @@ async def adjust_stock(
             "user-123",  # Mock user ID for now
             adjustment.notes
         )
+        if not updated_product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Product with ID '{product_id}' not found"
+            )
         
         return updated_product
         
@@ -233,12 +248,12 @@ async def adjust_stock(
 @router.get("/barcode/{barcode}", response_model=ProductResponse)
 async def get_product_by_barcode(
     barcode: str,
-    db: Session = Depends(get_db)
+    request: Request,
+    service: ProductService = Depends(get_product_service)
 ):
     """
     Get product by barcode (for barcode scanning)
     """
-    service = ProductService(db)
     product = service.get_product_by_barcode(barcode)
     
     if not product:
@@ -247,17 +262,17 @@ async def get_product_by_barcode(
             detail=f"Product with barcode '{barcode}' not found"
         )
     
-    return product
+    return cached_json_response(request, product.model_dump())
 
 @router.get("/sku/{sku}", response_model=ProductResponse)
 async def get_product_by_sku(
     sku: str,
-    db: Session = Depends(get_db)
+    request: Request,
+    service: ProductService = Depends(get_product_service)
 ):
     """
     Get product by SKU
     """
-    service = ProductService(db)
     product = service.get_product_by_sku(sku)
     
     if not product:
@@ -266,19 +281,19 @@ async def get_product_by_sku(
             detail=f"Product with SKU '{sku}' not found"
         )
     
-    return product
+    return cached_json_response(request, product.model_dump())
 
 @router.get("/categories/list")
 async def get_categories(
-    db: Session = Depends(get_db)
+    request: Request,
+    service: ProductService = Depends(get_product_service)
 ):
     """
     Get list of all product categories and subcategories
     """
     try:
-        service = ProductService(db)
         categories = service.get_categories()
-        return {"categories": categories}
+        return cached_json_response(request, {"categories": categories})
         
     except Exception as e:
         raise HTTPException(
@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from database.connection import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import TypeAdapter
+from typing import AsyncIterator, List, Optional
 from models.purchase_order import (
     PurchaseOrder, PurchaseOrderItem, SupplierProduct, 
     DeliveryTracking, PurchaseOrderStatus, DeliveryStatus
@@ -10,296 +10,240 @@ from models.product import Product, Supplier
 from models.purchase_schemas import (
     PurchaseOrderCreate, PurchaseOrderResponse, PurchaseOrderUpdate,
     SupplierCreate, SupplierResponse, DeliveryTrackingUpdate,
-    PurchaseOrderSummary, DeliveryMetrics, ReceiveItemsRequest
+    PurchaseOrderSummary, DeliveryMetrics, PurchaseDashboard, ReceiveItemsRequest,
+    ReceiveItemsResponse, DeliveryTrackingResponse, ReorderSuggestionsResponse
 )
-from services.purchase_order_service import PurchaseOrderService
+from models.schemas import MessageResponse
+from routes.http_cache import cached_json_response
+from services.purchase_order_service import PurchaseOrderService, get_purchase_order_service
 from datetime import datetime
 import uuid
 
-router = APIRouter()
+# Operation ids are the handler names (get_suppliers, receive_items, ...) instead of
+# FastAPI's path-derived default, so generated API clients get stable method names
+router = APIRouter(generate_unique_id_function=lambda route: route.name)
+
+# Built once at import; reused to validate and serialize list responses
+PO_ADAPTER = TypeAdapter(PurchaseOrderResponse)
+SUPPLIER_LIST_ADAPTER = TypeAdapter(List[SupplierResponse])
+
+async def _stream_purchase_order_list(orders: AsyncIterator[PurchaseOrder]) -> AsyncIterator[bytes]:
+    """
+    Emit a JSON array of purchase orders one order at a time, as rows arrive
+    from the database, instead of validating and encoding the whole page first
+    """
+    yield b"["
+    first = True
+    async for order in orders:
+        if not first:
+            yield b","
+        first = False
+        yield PO_ADAPTER.dump_json(PO_ADAPTER.validate_python(order), by_alias=True)
+    yield b"]"
 
 # Supplier Routes
 @router.get("/suppliers", response_model=List[SupplierResponse])
 async def get_suppliers(
+    request: Request,
     active_only: bool = True,
-    db: Session = Depends(get_db)
+    service: PurchaseOrderService = Depends(get_purchase_order_service)
 ):
     """Get all suppliers"""
-    try:
-        service = PurchaseOrderService(db)
-        return service.get_suppliers(active_only=active_only)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch suppliers: {str(e)}"
-        )
+    # Already SupplierResponse models: dump and encode without re-validating
+    suppliers = await service.get_suppliers(active_only=active_only)
+    return cached_json_response(request, SUPPLIER_LIST_ADAPTER.dump_python(suppliers))
 
 @router.post("/suppliers", response_model=SupplierResponse)
 async def create_supplier(
     supplier_data: SupplierCreate,
-    db: Session = Depends(get_db)
+    service: PurchaseOrderService = Depends(get_purchase_order_service)
 ):
     """Create a new supplier"""
-    try:
-        service = PurchaseOrderService(db)
-        return service.create_supplier(supplier_data)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to create supplier: {str(e)}"
-        )
+    return await service.create_supplier(supplier_data)
 
 @router.get("/suppliers/{supplier_id}", response_model=SupplierResponse)
 async def get_supplier(
     supplier_id: str,
-    db: Session = Depends(get_db)
+    service: PurchaseOrderService = Depends(get_purchase_order_service)
 ):
     """Get supplier by ID"""
-    try:
-        service = PurchaseOrderService(db)
-        supplier = service.get_supplier_by_id(supplier_id)
-        if not supplier:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Supplier not found"
-            )
-        return supplier
-    except HTTPException:
-        raise
-    except Exception as e:
+    supplier = await service.get_supplier_by_id(supplier_id)
+    if not supplier:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch supplier: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Supplier not found"
         )
+    return supplier
 
 # Purchase Order Routes
 @router.get("/", response_model=List[PurchaseOrderResponse])
 async def get_purchase_orders(
     status: Optional[PurchaseOrderStatus] = None,
     supplier_id: Optional[str] = None,
-    page: int = 1,
-    per_page: int = 20,
-    db: Session = Depends(get_db)
+    page: int = Query(1, ge=1, description="Page number"),
+    per_page: int = Query(20, ge=1, le=100, description="Items per page"),
+    service: PurchaseOrderService = Depends(get_purchase_order_service)
 ):
-    """Get purchase orders with filtering"""
-    try:
-        service = PurchaseOrderService(db)
-        return service.get_purchase_orders(
-            status=status,
-            supplier_id=supplier_id,
-            page=page,
-            per_page=per_page
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch purchase orders: {str(e)}"
-        )
+    """
+    Get purchase orders with filtering.
+    The body stays a plain list; pagination totals travel in X-Total-Count
+    and X-Total-Pages.
+    """
+    orders, total_count = await service.get_purchase_orders(
+        status=status,
+        supplier_id=supplier_id,
+        page=page,
+        per_page=per_page
+    )
+    return StreamingResponse(
+        _stream_purchase_order_list(orders),
+        media_type="application/json",
+        headers={
+            "X-Total-Count": str(total_count),
+            "X-Total-Pages": str((total_count + per_page - 1) // per_page)
+        }
+    )
 
 @router.post("/", response_model=PurchaseOrderResponse)
 async def create_purchase_order(
     order_data: PurchaseOrderCreate,
     created_by: str = Query(..., description="User ID who created the order"),
-    db: Session = Depends(get_db)
+    service: PurchaseOrderService = Depends(get_purchase_order_service)
 ):
     """Create a new purchase order"""
-    try:
-        service = PurchaseOrderService(db)
-        return service.create_purchase_order(order_data, created_by)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to create purchase order: {str(e)}"
-        )
+    return await service.create_purchase_order(order_data, created_by)
 
 @router.get("/{order_id}", response_model=PurchaseOrderResponse)
 async def get_purchase_order(
     order_id: str,
-    db: Session = Depends(get_db)
+    service: PurchaseOrderService = Depends(get_purchase_order_service)
 ):
     """Get purchase order by ID"""
-    try:
-        service = PurchaseOrderService(db)
-        order = service.get_purchase_order_by_id(order_id)
-        if not order:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Purchase order not found"
-            )
-        return order
-    except HTTPException:
-        raise
-    except Exception as e:
+    order = await service.get_purchase_order_by_id(order_id)
+    if not order:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch purchase order: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Purchase order not found"
         )
+    return order
 
 @router.put("/{order_id}", response_model=PurchaseOrderResponse)
 async def update_purchase_order(
     order_id: str,
     update_data: PurchaseOrderUpdate,
-    db: Session = Depends(get_db)
+    service: PurchaseOrderService = Depends(get_purchase_order_service)
 ):
     """Update purchase order"""
-    try:
-        service = PurchaseOrderService(db)
-        order = service.update_purchase_order(order_id, update_data)
-        if not order:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Purchase order not found"
-            )
-        return order
-    except HTTPException:
-        raise
-    except Exception as e:
+    order = await service.update_purchase_order(order_id, update_data)
+    if not order:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to update purchase order: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Purchase order not found"
         )
+    return order
 
-@router.post("/{order_id}/approve")
+@router.post("/{order_id}/approve", response_model=MessageResponse)
 async def approve_purchase_order(
     order_id: str,
     approved_by: str,  # This would come from auth token
-    db: Session = Depends(get_db)
+    service: PurchaseOrderService = Depends(get_purchase_order_service)
 ):
     """Approve a purchase order"""
-    try:
-        service = PurchaseOrderService(db)
-        result = service.approve_purchase_order(order_id, approved_by)
-        if not result:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Purchase order not found"
-            )
-        return {"message": "Purchase order approved successfully", "success": True}
-    except HTTPException:
-        raise
-    except Exception as e:
+    result = await service.approve_purchase_order(order_id, approved_by)
+    if not result:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to approve purchase order: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Purchase order not found"
         )
+    return MessageResponse(message="Purchase order approved successfully")
 
-@router.post("/{order_id}/receive")
+@router.post("/{order_id}/receive", response_model=ReceiveItemsResponse)
 async def receive_items(
     order_id: str,
     receive_data: ReceiveItemsRequest,
-    db: Session = Depends(get_db)
+    service: PurchaseOrderService = Depends(get_purchase_order_service)
 ):
     """Mark items as received and automatically update inventory"""
-    try:
-        service = PurchaseOrderService(db)
-        result = service.receive_items(order_id, receive_data)
-        if not result:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Purchase order not found"
-            )
-        return {
-            "message": "Items received and inventory updated successfully", 
-            "success": True,
-            "items_processed": len(receive_data.items)
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
+    result = await service.receive_items(order_id, receive_data)
+    if not result:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to receive items: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Purchase order not found"
         )
+    return ReceiveItemsResponse(
+        message="Items received and inventory updated successfully",
+        items_processed=len(receive_data.items)
+    )
 
 # Delivery Tracking Routes
-@router.get("/{order_id}/tracking")
+@router.get("/{order_id}/tracking", response_model=DeliveryTrackingResponse)
 async def get_delivery_tracking(
     order_id: str,
-    db: Session = Depends(get_db)
+    service: PurchaseOrderService = Depends(get_purchase_order_service)
 ):
     """Get delivery tracking information for a purchase order"""
-    try:
-        service = PurchaseOrderService(db)
-        tracking = service.get_delivery_tracking(order_id)
-        if not tracking:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Delivery tracking not found"
-            )
-        return tracking
-    except HTTPException:
-        raise
-    except Exception as e:
+    tracking = await service.get_delivery_tracking(order_id)
+    if not tracking:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch delivery tracking: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Delivery tracking not found"
         )
+    return tracking
 
-@router.put("/{order_id}/tracking")
+@router.put("/{order_id}/tracking", response_model=DeliveryTrackingResponse)
 async def update_delivery_tracking(
     order_id: str,
     tracking_data: DeliveryTrackingUpdate,
-    db: Session = Depends(get_db)
+    service: PurchaseOrderService = Depends(get_purchase_order_service)
 ):
     """Update delivery tracking information"""
-    try:
-        service = PurchaseOrderService(db)
-        tracking = service.update_delivery_tracking(order_id, tracking_data)
-        if not tracking:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Purchase order or tracking not found"
-            )
-        return tracking
-    except HTTPException:
-        raise
-    except Exception as e:
+    tracking = await service.update_delivery_tracking(order_id, tracking_data)
+    if not tracking:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to update delivery tracking: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Purchase order or tracking not found"
         )
+    return tracking
 
 # Dashboard/Summary Routes
 @router.get("/summary/orders", response_model=PurchaseOrderSummary)
 async def get_purchase_order_summary(
-    db: Session = Depends(get_db)
+    request: Request,
+    service: PurchaseOrderService = Depends(get_purchase_order_service)
 ):
     """Get purchase order summary for dashboard"""
-    try:
-        service = PurchaseOrderService(db)
-        return service.get_purchase_order_summary()
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch purchase order summary: {str(e)}"
-        )
+    summary = await service.get_purchase_order_summary()
+    return cached_json_response(request, summary.model_dump())
 
 @router.get("/summary/deliveries", response_model=DeliveryMetrics)
 async def get_delivery_metrics(
-    db: Session = Depends(get_db)
+    service: PurchaseOrderService = Depends(get_purchase_order_service)
 ):
     """Get delivery metrics for dashboard"""
-    try:
-        service = PurchaseOrderService(db)
-        return service.get_delivery_metrics()
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch delivery metrics: {str(e)}"
-        )
+    return await service.get_delivery_metrics()
+
+@router.get("/summary/dashboard", response_model=PurchaseDashboard)
+async def get_purchase_dashboard(
+    service: PurchaseOrderService = Depends(get_purchase_order_service)
+):
+    """
+    Order summary, delivery metrics and active suppliers in one response.
+    The three reads share the request's session (which runs one statement at a
+    time), so they are awaited in turn; each is served from the dashboard cache
+    when warm.
+    """
+    return PurchaseDashboard(
+        orders=await service.get_purchase_order_summary(),
+        deliveries=await service.get_delivery_metrics(),
+        active_suppliers=await service.get_suppliers(active_only=True)
+    )
 
 # Quick Actions
-@router.get("/products/reorder-suggestions")
+@router.get("/products/reorder-suggestions", response_model=ReorderSuggestionsResponse)
 async def get_reorder_suggestions(
-    limit: int = 10,
-    db: Session = Depends(get_db)
+    limit: int = Query(10, ge=1, le=100, description="Maximum suggestions"),
+    service: PurchaseOrderService = Depends(get_purchase_order_service)
 ):
     """Get products that need reordering based on stock levels"""
-    try:
-        service = PurchaseOrderService(db)
-        return service.get_reorder_suggestions(limit)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch reorder suggestions: {str(e)}"
-        ) 
\ No newline at end of file
+    # Plain dicts of JSON types: hand them straight to orjson
+    return ORJSONResponse(await service.get_reorder_suggestions(limit))
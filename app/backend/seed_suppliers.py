@@ -6,8 +6,16 @@ Adds sample suppliers to the database for testing purchase order functionality
 
 import sqlite3
 import os
-import uuid
-from datetime import datetime
+from datetime import datetime, timezone
+
+from models.product import generate_id
+
+SUPPLIER_COLUMNS = (
+    "id", "name", "company_name", "contact_person", "email", "phone", "address",
+    "tax_id", "payment_terms", "lead_time_days", "minimum_order_value",
+    "rating", "total_orders", "on_time_delivery_rate", "is_active", "is_preferred",
+    "created_at", "updated_at"
+)
 
 def seed_suppliers():
     """Add sample suppliers to the database"""
@@ -18,10 +26,9 @@ def seed_suppliers():
     print(f"🌱 Starting supplier seeding...")
     print(f"📁 Database path: {db_path}")
     
-    # Sample suppliers data
-    suppliers_data = [
+    # Sample suppliers data (ids and timestamps are attached below)
+    sample_suppliers = [
         {
-            'id': str(uuid.uuid4()),
             'name': 'Fresh Foods Ltd',
             'company_name': 'Fresh Foods Limited',
             'contact_person': 'John Smith',
@@ -36,12 +43,9 @@ def seed_suppliers():
             'total_orders': 25,
             'on_time_delivery_rate': 95.0,
             'is_active': True,
-            'is_preferred': True,
-            'created_at': datetime.utcnow().isoformat(),
-            'updated_at': datetime.utcnow().isoformat()
+            'is_preferred': True
         },
         {
-            'id': str(uuid.uuid4()),
             'name': 'Dairy Direct',
             'company_name': 'Dairy Direct Supplies',
             'contact_person': 'Sarah Johnson',
@@ -56,12 +60,9 @@ def seed_suppliers():
             'total_orders': 40,
             'on_time_delivery_rate': 98.0,
             'is_active': True,
-            'is_preferred': True,
-            'created_at': datetime.utcnow().isoformat(),
-            'updated_at': datetime.utcnow().isoformat()
+            'is_preferred': True
         },
         {
-            'id': str(uuid.uuid4()),
             'name': 'Global Grocers',
             'company_name': 'Global Grocers International',
             'contact_person': 'Mike Chen',
@@ -76,12 +77,9 @@ def seed_suppliers():
             'total_orders': 15,
             'on_time_delivery_rate': 88.0,
             'is_active': True,
-            'is_preferred': False,
-            'created_at': datetime.utcnow().isoformat(),
-            'updated_at': datetime.utcnow().isoformat()
+            'is_preferred': False
         },
         {
-            'id': str(uuid.uuid4()),
             'name': 'Bakery Supplies Co',
             'company_name': 'Bakery Supplies Company',
             'contact_person': 'Emma Wilson',
@@ -96,52 +94,46 @@ def seed_suppliers():
             'total_orders': 32,
             'on_time_delivery_rate': 92.0,
             'is_active': True,
-            'is_preferred': True,
-            'created_at': datetime.utcnow().isoformat(),
-            'updated_at': datetime.utcnow().isoformat()
+            'is_preferred': True
         }
     ]
     
+    # One timestamp for the whole batch: naive UTC, like the app's own columns
+    now = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+    suppliers_data = [
+        {'id': generate_id(), **supplier, 'created_at': now, 'updated_at': now}
+        for supplier in sample_suppliers
+    ]
+    
     try:
-        # Connect to database
+        # Connect to database (same journal settings as the app's engine)
         conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
         cursor = conn.cursor()
         
-        # Check if suppliers already exist
-        cursor.execute("SELECT COUNT(*) FROM suppliers;")
-        existing_count = cursor.fetchone()[0]
-        
-        if existing_count > 0:
-            print(f"📊 Found {existing_count} existing suppliers")
-            print("🔄 Clearing existing suppliers to add fresh sample data...")
-            cursor.execute("DELETE FROM suppliers;")
-        
-        # Insert sample suppliers
-        insert_sql = """
-        INSERT INTO suppliers (
-            id, name, company_name, contact_person, email, phone, address, 
-            tax_id, payment_terms, lead_time_days, minimum_order_value, 
-            rating, total_orders, on_time_delivery_rate, is_active, is_preferred, 
-            created_at, updated_at
-        ) VALUES (
-            :id, :name, :company_name, :contact_person, :email, :phone, :address,
-            :tax_id, :payment_terms, :lead_time_days, :minimum_order_value,
-            :rating, :total_orders, :on_time_delivery_rate, :is_active, :is_preferred,
-            :created_at, :updated_at
+        # Insert sample suppliers, bound positionally in SUPPLIER_COLUMNS order
+        insert_sql = (
+            f"INSERT INTO suppliers ({', '.join(SUPPLIER_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(SUPPLIER_COLUMNS))})"
         )
-        """
+        rows = [tuple(supplier[column] for column in SUPPLIER_COLUMNS) for supplier in suppliers_data]
         
-        suppliers_added = 0
-        for supplier in suppliers_data:
-            try:
-                cursor.execute(insert_sql, supplier)
-                print(f"✅ Added supplier: {supplier['name']}")
-                suppliers_added += 1
-            except sqlite3.Error as e:
-                print(f"❌ Error adding supplier {supplier['name']}: {e}")
+        # Clear and insert in one transaction: committed on success, rolled back on error
+        with conn:
+            # Check if suppliers already exist
+            cursor.execute("SELECT COUNT(*) FROM suppliers;")
+            existing_count = cursor.fetchone()[0]
+            
+            if existing_count > 0:
+                print(f"📊 Found {existing_count} existing suppliers")
+                print("🔄 Clearing existing suppliers to add fresh sample data...")
+                cursor.execute("DELETE FROM suppliers;")
+            
+            cursor.executemany(insert_sql, rows)
         
-        # Commit changes
-        conn.commit()
+        suppliers_added = len(suppliers_data)
+        print(f"✅ Added suppliers: {', '.join(supplier['name'] for supplier in suppliers_data)}")
         
         # Verify the seeding
         cursor.execute("SELECT name, company_name, contact_person FROM suppliers ORDER BY name;")
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Serve the FastAPI app with uvicorn, choosing the mode from APP_ENV:
+auto-reload in development, one worker process per core otherwise.
+Used by run_backend.py, start_backend.py and the Docker image.
+"""
+
+import os
+
+import uvicorn
+from dotenv import load_dotenv
+
+def uvicorn_options():
+    """Reload in development; otherwise one worker process per core.
+    uvicorn[standard] ships uvloop and httptools, which uvicorn picks automatically."""
+    if os.getenv("APP_ENV", "development") == "development":
+        return {"reload": True}
+    return {"workers": os.cpu_count() or 1, "access_log": False}
+
+if __name__ == "__main__":
+    # APP_ENV may come from .env; workers inherit the loaded environment
+    load_dotenv()
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        **uvicorn_options()
+    )
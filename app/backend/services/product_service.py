@@ -1,15 +1,71 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
-from typing import List, Tuple, Optional
+from fastapi import Depends
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, defer, raiseload
+from sqlalchemy import and_, bindparam, or_, exists, func, select, update
+from typing import Iterator, List, Tuple, Optional
 from datetime import datetime
+from itertools import chain
+import time
 
-from models.product import Product, InventoryTransaction
+from database.connection import get_db
+from models.product import (
+    Product, InventoryTransaction, PRODUCT_SEARCH_CONFIG, PRODUCT_SEARCH_VECTOR
+)
 from models.schemas import (
     ProductCreate, 
     ProductUpdate, 
     ProductFilter,
     ProductResponse,
-    TransactionType
+    TransactionType,
+    StockStatus
+)
+
+# A NULL max_stock_threshold means no ceiling, as in the Product.stock_status column
+_MAX_STOCK_THRESHOLD = func.coalesce(Product.max_stock_threshold, 2147483647)
+
+# WHERE clause per stock status, built once; one dict lookup replaces an if/elif chain
+STOCK_STATUS_FILTERS = {
+    StockStatus.OUT_OF_STOCK: Product.quantity_in_stock <= 0,
+    StockStatus.LOW_STOCK: and_(
+        Product.quantity_in_stock > 0,
+        Product.quantity_in_stock <= Product.min_stock_threshold
+    ),
+    StockStatus.OVERSTOCK: Product.quantity_in_stock >= _MAX_STOCK_THRESHOLD,
+    StockStatus.NORMAL: and_(
+        Product.quantity_in_stock > Product.min_stock_threshold,
+        Product.quantity_in_stock < _MAX_STOCK_THRESHOLD
+    ),
+}
+
+# Rows fetched per round trip when iterating a product listing page
+PRODUCT_FETCH_BATCH_SIZE = 25
+
+# Process-local cache of get_categories(): (expires_at, categories).
+# Cleared on product writes in this process; the TTL bounds staleness when
+# several workers each hold their own copy.
+CATEGORIES_CACHE_TTL_SECONDS = 30
+_categories_cache: Optional[Tuple[float, List[dict]]] = None
+
+def invalidate_categories_cache():
+    global _categories_cache
+    _categories_cache = None
+
+# Wide columns a compact listing leaves out (deferred in SQL, omitted from the JSON)
+COMPACT_LIST_EXCLUDED_FIELDS = frozenset({"description", "dimensions"})
+
+# ProductResponse needs columns only: any relationship access while building one
+# would be a lazy load per row, so make it raise instead
+NO_RELATIONSHIP_LOADS = raiseload("*", sql_only=True)
+
+# Single-product lookups, built once and executed with bound parameters
+_ACTIVE_PRODUCT_BY_ID = select(Product).options(NO_RELATIONSHIP_LOADS).where(
+    and_(Product.id == bindparam("product_id"), Product.is_active == True)
+)
+_ACTIVE_PRODUCT_BY_SKU = select(Product).options(NO_RELATIONSHIP_LOADS).where(
+    and_(Product.sku == bindparam("sku"), Product.is_active == True)
+)
+_ACTIVE_PRODUCT_BY_BARCODE = select(Product).options(NO_RELATIONSHIP_LOADS).where(
+    and_(Product.barcode == bindparam("barcode"), Product.is_active == True)
 )
 
 class ProductService:
@@ -28,6 +84,7 @@ class ProductService:
         self.db.add(db_product)
         self.db.commit()
         self.db.refresh(db_product)
+        invalidate_categories_cache()
         
         # Create initial stock transaction if quantity > 0
         if product.quantity_in_stock > 0:
@@ -46,9 +103,7 @@ class ProductService:
         """
         Get a product by ID
         """
-        product = self.db.query(Product).filter(
-            and_(Product.id == product_id, Product.is_active == True)
-        ).first()
+        product = self.db.scalars(_ACTIVE_PRODUCT_BY_ID, {"product_id": product_id}).first()
         
         return self._to_response(product) if product else None
 
@@ -56,9 +111,7 @@ class ProductService:
         """
         Get a product by SKU
         """
-        product = self.db.query(Product).filter(
-            and_(Product.sku == sku, Product.is_active == True)
-        ).first()
+        product = self.db.scalars(_ACTIVE_PRODUCT_BY_SKU, {"sku": sku}).first()
         
         return self._to_response(product) if product else None
 
@@ -66,124 +119,174 @@ class ProductService:
         """
         Get a product by barcode
         """
-        product = self.db.query(Product).filter(
-            and_(Product.barcode == barcode, Product.is_active == True)
-        ).first()
+        product = self.db.scalars(_ACTIVE_PRODUCT_BY_BARCODE, {"barcode": barcode}).first()
         
         return self._to_response(product) if product else None
 
+    def sku_exists(self, sku: str) -> bool:
+        """
+        Check whether any product (active or not) already uses this SKU
+        """
+        return self.db.scalar(select(exists().where(Product.sku == sku)))
+
+    def barcode_exists(self, barcode: str, exclude_id: Optional[str] = None) -> bool:
+        """
+        Check whether any product (active or not) already uses this barcode,
+        optionally ignoring the product being updated
+        """
+        condition = Product.barcode == barcode
+        if exclude_id:
+            condition = and_(condition, Product.id != exclude_id)
+        return self.db.scalar(select(exists().where(condition)))
+
     def get_products_paginated(
         self, 
         page: int = 1, 
         per_page: int = 20, 
-        filters: Optional[ProductFilter] = None
-    ) -> Tuple[List[ProductResponse], int]:
+        filters: Optional[ProductFilter] = None,
+        after_id: Optional[str] = None,
+        compact: bool = False
+    ) -> Tuple[Iterator[ProductResponse], int]:
         """
-        Get paginated list of products with filters
+        Get paginated list of products with filters.
+        Pages are ordered by id; pass after_id (the last id of the previous page)
+        for keyset pagination, which seeks the primary key instead of skipping
+        (page - 1) * per_page rows.
+        compact skips fetching COMPACT_LIST_EXCLUDED_FIELDS; they stay None.
+        The page is returned as a lazy iterator that fetches rows in batches of
+        PRODUCT_FETCH_BATCH_SIZE, so it must be consumed while the session is open.
         """
-        query = self.db.query(Product).filter(Product.is_active == True)
+        conditions = [Product.is_active == True]
         
         # Apply filters
         if filters:
             if filters.category:
-                query = query.filter(Product.category.ilike(f"%{filters.category}%"))
+                conditions.append(Product.category.ilike(f"%{filters.category}%"))
             
             if filters.subcategory:
-                query = query.filter(Product.subcategory.ilike(f"%{filters.subcategory}%"))
+                conditions.append(Product.subcategory.ilike(f"%{filters.subcategory}%"))
             
             if filters.brand:
-                query = query.filter(Product.brand.ilike(f"%{filters.brand}%"))
+                conditions.append(Product.brand.ilike(f"%{filters.brand}%"))
             
             if filters.supplier_id:
-                query = query.filter(Product.supplier_id == filters.supplier_id)
+                conditions.append(Product.supplier_id == filters.supplier_id)
             
             if filters.warehouse_id:
-                query = query.filter(Product.warehouse_id == filters.warehouse_id)
+                conditions.append(Product.warehouse_id == filters.warehouse_id)
             
             if filters.is_perishable is not None:
-                query = query.filter(Product.is_perishable == filters.is_perishable)
+                conditions.append(Product.is_perishable == filters.is_perishable)
             
             if filters.aisle:
-                query = query.filter(Product.aisle.ilike(f"%{filters.aisle}%"))
+                conditions.append(Product.aisle.ilike(f"%{filters.aisle}%"))
             
             if filters.stock_status:
-                if filters.stock_status == "OUT_OF_STOCK":
-                    query = query.filter(Product.quantity_in_stock <= 0)
-                elif filters.stock_status == "LOW_STOCK":
-                    query = query.filter(
-                        and_(
-                            Product.quantity_in_stock > 0,
-                            Product.quantity_in_stock <= Product.min_stock_threshold
-                        )
-                    )
-                elif filters.stock_status == "OVERSTOCK":
-                    query = query.filter(Product.quantity_in_stock >= Product.max_stock_threshold)
-                elif filters.stock_status == "NORMAL":
-                    query = query.filter(
-                        and_(
-                            Product.quantity_in_stock > Product.min_stock_threshold,
-                            Product.quantity_in_stock < Product.max_stock_threshold
-                        )
-                    )
+                conditions.append(STOCK_STATUS_FILTERS[filters.stock_status])
             
             if filters.search:
                 search_term = f"%{filters.search}%"
-                query = query.filter(
-                    or_(
+                if self.db.bind.dialect.name == "postgresql":
+                    # Words go through the full-text index; codes keep substring matching
+                    text_match = PRODUCT_SEARCH_VECTOR.op("@@")(
+                        func.plainto_tsquery(PRODUCT_SEARCH_CONFIG, filters.search)
+                    )
+                else:
+                    text_match = or_(
                         Product.name.ilike(search_term),
-                        Product.description.ilike(search_term),
+                        Product.description.ilike(search_term)
+                    )
+                conditions.append(
+                    or_(
+                        text_match,
                         Product.barcode.ilike(search_term),
                         Product.sku.ilike(search_term)
                     )
                 )
         
-        # Get total count before pagination
-        total_count = query.count()
-        
-        # Apply pagination
-        offset = (page - 1) * per_page
-        products = query.offset(offset).limit(per_page).all()
-        
-        return [self._to_response(product) for product in products], total_count
+        # One statement built from the collected conditions (no per-filter Query clones)
+        stmt = (
+            select(Product)
+            .options(NO_RELATIONSHIP_LOADS)
+            .where(*conditions)
+            .order_by(Product.id)
+            .limit(per_page)
+            .execution_options(yield_per=PRODUCT_FETCH_BATCH_SIZE)
+        )
+        count_stmt = select(func.count()).select_from(Product).where(*conditions)
+        to_response = self._to_response
+        if compact:
+            stmt = stmt.options(*(defer(getattr(Product, field)) for field in COMPACT_LIST_EXCLUDED_FIELDS))
+            to_response = self._to_loaded_response
+        
+        if after_id:
+            # Keyset pages count the whole filtered set, not just the rows past after_id
+            total_count = self.db.scalar(count_stmt)
+            products = self.db.scalars(stmt.where(Product.id > after_id))
+            return (to_response(product) for product in products), total_count
+        
+        # Offset pages carry the filtered total on every row (COUNT(*) OVER () is
+        # evaluated before OFFSET/LIMIT), so the page and its total are one query
+        rows = iter(self.db.execute(
+            stmt.add_columns(func.count().over()).offset((page - 1) * per_page)
+        ))
+        first_row = next(rows, None)
+        if first_row is None:
+            # No row to read the total from: nothing matched, or the page is past the end
+            return iter(()), self.db.scalar(count_stmt) if page > 1 else 0
+        
+        total_count = first_row[1]
+        return (to_response(product) for product, _ in chain([first_row], rows)), total_count
 
-    def update_product(self, product_id: str, product_update: ProductUpdate) -> ProductResponse:
+    def update_product(self, product_id: str, product_update: ProductUpdate) -> Optional[ProductResponse]:
         """
-        Update a product's information
+        Update a product's information with a single UPDATE ... RETURNING.
+        Returns None when no active product has this ID; raises ValueError
+        when the new barcode belongs to another product.
         """
-        product = self.db.query(Product).filter(
-            and_(Product.id == product_id, Product.is_active == True)
-        ).first()
-        
-        if not product:
-            raise ValueError(f"Product with ID '{product_id}' not found")
-        
-        # Update only provided fields
         update_data = product_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(product, field, value)
+        try:
+            product = self.db.execute(
+                update(Product)
+                .where(and_(Product.id == product_id, Product.is_active == True))
+                .values(**update_data, updated_at=func.now())
+                .returning(Product)
+            ).scalar_one_or_none()
+        except IntegrityError:
+            # Only a matched row can violate a constraint, so a missing product
+            # is still reported as None above; name the barcode clash precisely
+            self.db.rollback()
+            barcode = update_data.get("barcode")
+            if barcode and self.barcode_exists(barcode, exclude_id=product_id):
+                raise ValueError(f"Product with barcode '{barcode}' already exists")
+            raise
         
-        product.updated_at = datetime.utcnow()
+        if not product:
+            return None
         
+        # Build the response from the returned row before commit expires it
+        response = self._to_response(product)
         self.db.commit()
-        self.db.refresh(product)
+        invalidate_categories_cache()
         
-        return self._to_response(product)
+        return response
 
     def delete_product(self, product_id: str) -> bool:
         """
         Soft delete a product (mark as inactive)
         """
-        product = self.db.query(Product).filter(
-            and_(Product.id == product_id, Product.is_active == True)
-        ).first()
-        
-        if not product:
+        deleted_id = self.db.execute(
+            update(Product)
+            .where(and_(Product.id == product_id, Product.is_active == True))
+            .values(is_active=False, updated_at=func.now())
+            .returning(Product.id)
+        ).scalar_one_or_none()
+        
+        if not deleted_id:
             return False
         
-        product.is_active = False
-        product.updated_at = datetime.utcnow()
-        
         self.db.commit()
+        invalidate_categories_cache()
         return True
 
     def adjust_stock(
@@ -193,26 +296,29 @@ class ProductService:
         reason: str,
         user_id: str,
         notes: Optional[str] = None
-    ) -> ProductResponse:
+    ) -> Optional[ProductResponse]:
         """
-        Adjust product stock quantity and create transaction record
+        Adjust product stock quantity and create transaction record.
+        Returns None when no active product has this ID.
         """
-        product = self.db.query(Product).filter(
-            and_(Product.id == product_id, Product.is_active == True)
-        ).first()
+        old_quantity = self.db.scalar(
+            select(Product.quantity_in_stock)
+            .where(and_(Product.id == product_id, Product.is_active == True))
+            .with_for_update()
+        )
         
-        if not product:
-            raise ValueError(f"Product with ID '{product_id}' not found")
+        if old_quantity is None:
+            return None
         
-        old_quantity = product.quantity_in_stock
         quantity_change = new_quantity - old_quantity
         
-        # Update product quantity
-        product.quantity_in_stock = new_quantity
-        product.updated_at = datetime.utcnow()
-        
-        # Create inventory transaction
-        transaction_type = TransactionType.IN if quantity_change > 0 else TransactionType.OUT
+        # Update product quantity; RETURNING brings back the recomputed stock flags
+        product = self.db.execute(
+            update(Product)
+            .where(Product.id == product_id)
+            .values(quantity_in_stock=new_quantity, updated_at=func.now())
+            .returning(Product)
+        ).scalar_one()
         
         self._create_stock_transaction(
             product_id=product_id,
@@ -223,15 +329,19 @@ class ProductService:
             user_id=user_id
         )
         
+        response = self._to_response(product)
         self.db.commit()
-        self.db.refresh(product)
         
-        return self._to_response(product)
+        return response
 
     def get_categories(self) -> List[dict]:
         """
-        Get all unique categories and subcategories
+        Get all unique categories and subcategories (cached, see CATEGORIES_CACHE_TTL_SECONDS)
         """
+        global _categories_cache
+        if _categories_cache is not None and _categories_cache[0] > time.monotonic():
+            return _categories_cache[1]
+        
         categories_query = self.db.query(
             Product.category,
             Product.subcategory
@@ -252,53 +362,88 @@ class ProductService:
                 "subcategories": list(subcategories)
             })
         
+        _categories_cache = (time.monotonic() + CATEGORIES_CACHE_TTL_SECONDS, categories)
         return categories
 
-    def get_low_stock_products(self) -> List[ProductResponse]:
+    def get_low_stock_products(self) -> Iterator[ProductResponse]:
         """
         Get products with low stock levels
+        (lazy iterator over PRODUCT_FETCH_BATCH_SIZE batches; consume while the session is open)
         """
-        products = self.db.query(Product).filter(
+        products = self.db.query(Product).options(NO_RELATIONSHIP_LOADS).filter(
             and_(
                 Product.is_active == True,
                 Product.quantity_in_stock <= Product.min_stock_threshold,
                 Product.quantity_in_stock > 0
             )
-        ).all()
+        ).yield_per(PRODUCT_FETCH_BATCH_SIZE)
         
-        return [self._to_response(product) for product in products]
+        return (self._to_response(product) for product in products)
 
-    def get_out_of_stock_products(self) -> List[ProductResponse]:
+    def get_out_of_stock_products(self) -> Iterator[ProductResponse]:
         """
         Get products that are out of stock
+        (lazy iterator over PRODUCT_FETCH_BATCH_SIZE batches; consume while the session is open)
         """
-        products = self.db.query(Product).filter(
+        products = self.db.query(Product).options(NO_RELATIONSHIP_LOADS).filter(
             and_(
                 Product.is_active == True,
                 Product.quantity_in_stock <= 0
             )
-        ).all()
+        ).yield_per(PRODUCT_FETCH_BATCH_SIZE)
         
-        return [self._to_response(product) for product in products]
+        return (self._to_response(product) for product in products)
 
-    def get_expiring_products(self, days: int = 7) -> List[ProductResponse]:
+    def get_expiring_products(self, days: int = 7) -> Iterator[ProductResponse]:
         """
         Get products expiring within specified days
+        (lazy iterator over PRODUCT_FETCH_BATCH_SIZE batches; consume while the session is open)
         """
         from datetime import timedelta
         
         expiry_threshold = datetime.utcnow() + timedelta(days=days)
         
-        products = self.db.query(Product).filter(
+        products = self.db.query(Product).options(NO_RELATIONSHIP_LOADS).filter(
             and_(
                 Product.is_active == True,
                 Product.is_perishable == True,
                 Product.expiry_date <= expiry_threshold,
                 Product.expiry_date >= datetime.utcnow()
             )
-        ).all()
+        ).yield_per(PRODUCT_FETCH_BATCH_SIZE)
         
-        return [self._to_response(product) for product in products]
+        return (self._to_response(product) for product in products)
+
+    def get_inventory_stats(self, expiry_days: int = 7) -> Tuple[int, int, int, int, float]:
+        """
+        Get dashboard counters and total stock value in a single aggregate query.
+        Returns (total_products, low_stock_count, out_of_stock_count,
+        expiring_soon_count, total_value) over active products.
+        """
+        from datetime import timedelta
+        
+        now = datetime.utcnow()
+        expiry_threshold = now + timedelta(days=expiry_days)
+        
+        stats = self.db.execute(
+            select(
+                func.count(),
+                func.count().filter(and_(
+                    Product.quantity_in_stock <= Product.min_stock_threshold,
+                    Product.quantity_in_stock > 0
+                )),
+                func.count().filter(Product.quantity_in_stock <= 0),
+                func.count().filter(and_(
+                    Product.is_perishable == True,
+                    Product.expiry_date <= expiry_threshold,
+                    Product.expiry_date >= now
+                )),
+                func.coalesce(func.sum(Product.quantity_in_stock * Product.cost_price), 0.0)
+            ).where(Product.is_active == True)
+        ).one()
+        
+        total_products, low_stock_count, out_of_stock_count, expiring_soon_count, total_value = stats
+        return total_products, low_stock_count, out_of_stock_count, expiring_soon_count, float(total_value)
 
     def _create_stock_transaction(
         self,
@@ -328,38 +473,20 @@ class ProductService:
     def _to_response(self, product: Product) -> ProductResponse:
         """
         Convert Product model to ProductResponse schema
+        (from_attributes: pydantic-core reads the columns directly)
+        """
+        return ProductResponse.model_validate(product)
+
+    def _to_loaded_response(self, product: Product) -> ProductResponse:
         """
-        return ProductResponse(
-            id=product.id,
-            name=product.name,
-            description=product.description,
-            barcode=product.barcode,
-            sku=product.sku,
-            category=product.category,
-            subcategory=product.subcategory,
-            brand=product.brand,
-            cost_price=product.cost_price,
-            selling_price=product.selling_price,
-            quantity_in_stock=product.quantity_in_stock,
-            min_stock_threshold=product.min_stock_threshold,
-            max_stock_threshold=product.max_stock_threshold,
-            aisle=product.aisle,
-            shelf=product.shelf,
-            bin_location=product.bin_location,
-            warehouse_id=product.warehouse_id,
-            unit_of_measure=product.unit_of_measure,
-            weight=product.weight,
-            dimensions=product.dimensions,
-            is_perishable=product.is_perishable,
-            expiry_date=product.expiry_date,
-            days_until_expiry_warning=product.days_until_expiry_warning,
-            supplier_id=product.supplier_id,
-            supplier_sku=product.supplier_sku,
-            is_active=product.is_active,
-            created_at=product.created_at,
-            updated_at=product.updated_at,
-            created_by=product.created_by,
-            stock_status=product.stock_status,
-            is_low_stock=product.is_low_stock,
-            is_out_of_stock=product.is_out_of_stock
-        ) 
\ No newline at end of file
+        ProductResponse from the attributes already loaded on the instance:
+        deferred columns fall back to their schema defaults instead of being
+        lazy loaded one row at a time
+        """
+        return ProductResponse.model_validate(product.__dict__)
+
+def get_product_service(db: Session = Depends(get_db)) -> ProductService:
+    """
+    FastAPI dependency: one ProductService bound to the request's session
+    """
+    return ProductService(db)
@@ -1,71 +1,150 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, func
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy import Integer, and_, or_, bindparam, case, cast, desc, extract, func, select, true, update
+from database.connection import get_async_db
 from models.purchase_order import (
-    PurchaseOrder, PurchaseOrderItem, SupplierProduct, 
-    DeliveryTracking, PurchaseOrderStatus, DeliveryStatus
+    PurchaseOrder, PurchaseOrderCounter, PurchaseOrderItem, SupplierProduct, 
+    DeliveryTracking, DeliveryStatusEvent, PurchaseOrderStatus, DeliveryStatus
 )
-from models.product import Product, Supplier
+from models.product import Product, Supplier, REORDER_CANDIDATE, generate_id
 from models.purchase_schemas import (
-    PurchaseOrderCreate, PurchaseOrderUpdate, SupplierCreate,
+    PurchaseOrderCreate, PurchaseOrderUpdate, SupplierCreate, SupplierResponse,
     DeliveryTrackingUpdate, PurchaseOrderSummary, DeliveryMetrics,
     ReceiveItemsRequest
 )
-from services.product_service import ProductService
 from datetime import datetime, timedelta
-import uuid
+from typing import Any, Awaitable, Callable, Dict, Tuple
+import time
 import json
 
+# Orders fetched per round trip when streaming a purchase order listing page
+PURCHASE_ORDER_FETCH_BATCH_SIZE = 25
+
+# Process-local cache of the read-heavy dashboard queries: key -> (expires_at, value).
+# Cleared on purchase order and supplier writes in this process; the TTL bounds
+# staleness across workers and for stock changes made through the product routes.
+DASHBOARD_CACHE_TTL_SECONDS = 60
+# Keys include request parameters (reorder:{limit}), so bound the entry count
+DASHBOARD_CACHE_MAXSIZE = 128
+_dashboard_cache: Dict[str, Tuple[float, Any]] = {}
+
+def invalidate_dashboard_cache():
+    _dashboard_cache.clear()
+
+async def _cached(key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+    """Return the cached value for key, calling loader on a miss or after expiry"""
+    entry = _dashboard_cache.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    value = await loader()
+    _dashboard_cache.pop(key, None)
+    _dashboard_cache[key] = (time.monotonic() + DASHBOARD_CACHE_TTL_SECONDS, value)
+    if len(_dashboard_cache) > DASHBOARD_CACHE_MAXSIZE:
+        # Dicts keep insertion order: drop the entry written longest ago
+        del _dashboard_cache[next(iter(_dashboard_cache))]
+    return value
+
+# Lookups by key, built once and executed with bound parameters
+_SUPPLIER_BY_ID = select(Supplier).where(Supplier.id == bindparam("supplier_id"))
+_PURCHASE_ORDER_BY_ID = select(PurchaseOrder).options(
+    joinedload(PurchaseOrder.supplier),
+    selectinload(PurchaseOrder.order_items)
+).where(PurchaseOrder.id == bindparam("order_id")).execution_options(populate_existing=True)
+_DELIVERY_TRACKING_BY_ORDER = select(DeliveryTracking).options(
+    selectinload(DeliveryTracking.events)
+).where(
+    DeliveryTracking.purchase_order_id == bindparam("order_id")
+).execution_options(populate_existing=True)
+
 class PurchaseOrderService:
-    def __init__(self, db: Session):
+    """Purchase order operations on an AsyncSession; every query is awaited"""
+    def __init__(self, db: AsyncSession):
         self.db = db
 
     # Supplier Methods
-    def get_suppliers(self, active_only: bool = True):
-        """Get all suppliers"""
-        query = self.db.query(Supplier)
-        if active_only:
-            query = query.filter(Supplier.is_active == True)
-        return query.order_by(Supplier.name).all()
+    async def get_suppliers(self, active_only: bool = True):
+        """Get all suppliers (cached as response models, see DASHBOARD_CACHE_TTL_SECONDS)"""
+        async def load():
+            stmt = select(Supplier)
+            if active_only:
+                stmt = stmt.where(Supplier.is_active == True)
+            suppliers = (await self.db.scalars(stmt.order_by(Supplier.name))).all()
+            return [SupplierResponse.model_validate(supplier) for supplier in suppliers]
+        
+        return await _cached(f"suppliers:active={active_only}", load)
 
-    def create_supplier(self, supplier_data: SupplierCreate):
+    async def create_supplier(self, supplier_data: SupplierCreate):
         """Create a new supplier"""
         supplier = Supplier(
-            id=str(uuid.uuid4()),
+            id=generate_id(),
             **supplier_data.dict()
         )
         self.db.add(supplier)
-        self.db.commit()
-        self.db.refresh(supplier)
+        await self.db.commit()
+        invalidate_dashboard_cache()
+        await self.db.refresh(supplier)
         return supplier
 
-    def get_supplier_by_id(self, supplier_id: str):
+    async def get_supplier_by_id(self, supplier_id: str):
         """Get supplier by ID"""
-        return self.db.query(Supplier).filter(Supplier.id == supplier_id).first()
+        return await self.db.scalar(_SUPPLIER_BY_ID, {"supplier_id": supplier_id})
 
     # Purchase Order Methods
-    def get_purchase_orders(self, status=None, supplier_id=None, page=1, per_page=20):
-        """Get purchase orders with filtering"""
-        query = self.db.query(PurchaseOrder).options(
-            joinedload(PurchaseOrder.order_items),
-            joinedload(PurchaseOrder.supplier)
-        )
-        
+    async def get_purchase_orders(self, status=None, supplier_id=None, page=1, per_page=20):
+        """
+        Get one page of purchase orders with filtering, plus the filtered total.
+        The supplier is joined into the page query; items come from one extra
+        SELECT ... WHERE purchase_order_id IN (...) per batch, so LIMIT applies to
+        orders rather than to order x item rows.
+        The page is returned as an async stream that fetches orders in batches of
+        PURCHASE_ORDER_FETCH_BATCH_SIZE, so it must be consumed while the session
+        is open.
+        """
+        criteria = []
         if status:
-            query = query.filter(PurchaseOrder.status == status)
+            criteria.append(PurchaseOrder.status == status)
         if supplier_id:
-            query = query.filter(PurchaseOrder.supplier_id == supplier_id)
+            criteria.append(PurchaseOrder.supplier_id == supplier_id)
+        
+        total_count = await self._count(PurchaseOrder, *criteria)
+        
+        stmt = select(PurchaseOrder).options(
+            joinedload(PurchaseOrder.supplier),
+            selectinload(PurchaseOrder.order_items)
+        ).where(*criteria)
         
         offset = (page - 1) * per_page
-        return query.order_by(desc(PurchaseOrder.created_at)).offset(offset).limit(per_page).all()
+        stmt = stmt.order_by(desc(PurchaseOrder.created_at)).offset(offset).limit(per_page)
+        stmt = stmt.execution_options(yield_per=PURCHASE_ORDER_FETCH_BATCH_SIZE)
+        return await self.db.stream_scalars(stmt), total_count
 
-    def create_purchase_order(self, order_data: PurchaseOrderCreate, created_by: str):
+    async def create_purchase_order(self, order_data: PurchaseOrderCreate, created_by: str):
         """Create a new purchase order"""
         # Generate order number
-        order_number = self._generate_order_number()
+        order_number = await self._generate_order_number()
+        
+        # Snapshot name and SKU for every ordered product in one query
+        product_ids = {item_data.product_id for item_data in order_data.items}
+        products = {
+            product_id: (name, sku)
+            for product_id, name, sku in await self.db.execute(
+                select(Product.id, Product.name, Product.sku).where(Product.id.in_(product_ids))
+            )
+        }
+        missing_ids = product_ids - products.keys()
+        if missing_ids:
+            raise ValueError(f"Product with ID {min(missing_ids)} not found")
         
-        # Create purchase order
+        # Calculate totals
+        subtotal = sum(item_data.quantity_ordered * item_data.unit_price for item_data in order_data.items)
+        tax_amount = subtotal * 0.2  # 20% VAT for UK
+        
+        # Create purchase order; IDs are generated here, so nothing needs a flush
+        # and the unit of work inserts the order, then all items in one batch
         purchase_order = PurchaseOrder(
-            id=str(uuid.uuid4()),
+            id=generate_id(),
             order_number=order_number,
             supplier_id=order_data.supplier_id,
             expected_delivery_date=order_data.expected_delivery_date,
@@ -73,64 +152,49 @@ class PurchaseOrderService:
             delivery_instructions=order_data.delivery_instructions,
             notes=order_data.notes,
             created_by=created_by,
-            status=PurchaseOrderStatus.DRAFT
+            status=PurchaseOrderStatus.DRAFT,
+            subtotal=subtotal,
+            tax_amount=tax_amount,
+            total_amount=subtotal + tax_amount
         )
-        
         self.db.add(purchase_order)
-        self.db.flush()  # Get the ID without committing
-        
-        # Create order items and calculate totals
-        subtotal = 0.0
-        for item_data in order_data.items:
-            # Get product details
-            product = self.db.query(Product).filter(Product.id == item_data.product_id).first()
-            if not product:
-                raise ValueError(f"Product with ID {item_data.product_id} not found")
-            
-            total_price = item_data.quantity_ordered * item_data.unit_price
-            subtotal += total_price
-            
-            order_item = PurchaseOrderItem(
-                id=str(uuid.uuid4()),
+        
+        self.db.add_all([
+            PurchaseOrderItem(
+                id=generate_id(),
                 purchase_order_id=purchase_order.id,
                 product_id=item_data.product_id,
                 quantity_ordered=item_data.quantity_ordered,
                 unit_price=item_data.unit_price,
-                total_price=total_price,
-                product_name=product.name,
-                product_sku=product.sku,
+                total_price=item_data.quantity_ordered * item_data.unit_price,
+                product_name=products[item_data.product_id][0],
+                product_sku=products[item_data.product_id][1],
                 supplier_sku=item_data.supplier_sku
             )
-            self.db.add(order_item)
-        
-        # Calculate totals
-        tax_amount = subtotal * 0.2  # 20% VAT for UK
-        purchase_order.subtotal = subtotal
-        purchase_order.tax_amount = tax_amount
-        purchase_order.total_amount = subtotal + tax_amount + (purchase_order.shipping_cost or 0)
+            for item_data in order_data.items
+        ])
         
         # Create delivery tracking
         delivery_tracking = DeliveryTracking(
-            id=str(uuid.uuid4()),
+            id=generate_id(),
             purchase_order_id=purchase_order.id,
             status=DeliveryStatus.PENDING
         )
         self.db.add(delivery_tracking)
+        self._record_delivery_status(delivery_tracking)
         
-        self.db.commit()
-        self.db.refresh(purchase_order)
-        return purchase_order
+        await self.db.commit()
+        invalidate_dashboard_cache()
+        # Reload with items and supplier: lazy loads are not available under asyncio
+        return await self.get_purchase_order_by_id(purchase_order.id)
 
-    def get_purchase_order_by_id(self, order_id: str):
+    async def get_purchase_order_by_id(self, order_id: str):
         """Get purchase order by ID with all related data"""
-        return self.db.query(PurchaseOrder).options(
-            joinedload(PurchaseOrder.order_items),
-            joinedload(PurchaseOrder.supplier)
-        ).filter(PurchaseOrder.id == order_id).first()
+        return await self.db.scalar(_PURCHASE_ORDER_BY_ID, {"order_id": order_id})
 
-    def update_purchase_order(self, order_id: str, update_data: PurchaseOrderUpdate):
+    async def update_purchase_order(self, order_id: str, update_data: PurchaseOrderUpdate):
         """Update purchase order"""
-        purchase_order = self.get_purchase_order_by_id(order_id)
+        purchase_order = await self.get_purchase_order_by_id(order_id)
         if not purchase_order:
             return None
         
@@ -139,57 +203,76 @@ class PurchaseOrderService:
             setattr(purchase_order, field, value)
         
         purchase_order.updated_at = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(purchase_order)
+        await self.db.commit()
+        invalidate_dashboard_cache()
         return purchase_order
 
-    def approve_purchase_order(self, order_id: str, approved_by: str):
-        """Approve a purchase order"""
-        purchase_order = self.get_purchase_order_by_id(order_id)
-        if not purchase_order:
+    async def approve_purchase_order(self, order_id: str, approved_by: str):
+        """
+        Approve a purchase order with one UPDATE ... RETURNING (no row load, no
+        read-then-write window). Returns None when no order has this ID.
+        """
+        approved_at = datetime.utcnow()
+        approved_id = await self.db.scalar(
+            update(PurchaseOrder)
+            .where(PurchaseOrder.id == order_id)
+            .values(
+                status=PurchaseOrderStatus.APPROVED.value,
+                approved_by=approved_by,
+                approved_at=approved_at,
+                updated_at=approved_at
+            )
+            .returning(PurchaseOrder.id)
+        )
+        if approved_id is None:
             return None
         
-        purchase_order.status = PurchaseOrderStatus.APPROVED
-        purchase_order.approved_by = approved_by
-        purchase_order.approved_at = datetime.utcnow()
-        purchase_order.updated_at = datetime.utcnow()
-        
-        self.db.commit()
+        await self.db.commit()
+        invalidate_dashboard_cache()
         return True
 
-    def receive_items(self, order_id: str, receive_data: ReceiveItemsRequest):
-        """Receive items and automatically update inventory"""
-        purchase_order = self.get_purchase_order_by_id(order_id)
+    async def receive_items(self, order_id: str, receive_data: ReceiveItemsRequest):
+        """
+        Receive items and automatically update inventory.
+        Items come from the order's already-loaded collection, and all stock
+        increments go out as one UPDATE; everything commits together.
+        """
+        purchase_order = await self.get_purchase_order_by_id(order_id)
         if not purchase_order:
             return None
         
-        product_service = ProductService(self.db)
-        received_items = 0
+        items_by_id = {item.id: item for item in purchase_order.order_items}
+        received_at = datetime.utcnow()
+        stock_increments: Dict[str, int] = {}
         
         for item_data in receive_data.items:
-            # Find the order item
-            order_item = self.db.query(PurchaseOrderItem).filter(
-                and_(
-                    PurchaseOrderItem.purchase_order_id == order_id,
-                    PurchaseOrderItem.id == item_data["item_id"]
-                )
-            ).first()
+            order_item = items_by_id.get(item_data["item_id"])
             
             if order_item:
-                # Update order item
+                # Update order item (flushed as one batched UPDATE)
                 quantity_received = item_data.get("quantity_received", 0)
                 order_item.quantity_received += quantity_received
                 order_item.is_received = order_item.quantity_received >= order_item.quantity_ordered
                 order_item.quality_notes = item_data.get("quality_notes")
-                order_item.received_date = datetime.utcnow()
+                order_item.received_date = received_at
                 
-                # Update product inventory
-                product = self.db.query(Product).filter(Product.id == order_item.product_id).first()
-                if product:
-                    product.quantity_in_stock += quantity_received
-                    product.updated_at = datetime.utcnow()
-                
-                received_items += 1
+                stock_increments[order_item.product_id] = (
+                    stock_increments.get(order_item.product_id, 0) + quantity_received
+                )
+        
+        # Update product inventory: quantity_in_stock += CASE id WHEN ... END
+        if stock_increments:
+            await self.db.execute(
+                update(Product)
+                .where(Product.id.in_(stock_increments))
+                .values(
+                    quantity_in_stock=Product.quantity_in_stock + case(
+                        stock_increments, value=Product.id, else_=0
+                    ),
+                    updated_at=received_at
+                )
+                .execution_options(synchronize_session=False)
+            )
         
         # Check if all items are received
         all_items_received = all(
@@ -201,73 +284,102 @@ class PurchaseOrderService:
             purchase_order.actual_delivery_date = datetime.utcnow()
             
             # Update delivery tracking
-            delivery_tracking = self.db.query(DeliveryTracking).filter(
+            delivery_tracking = await self.db.scalar(select(DeliveryTracking).where(
                 DeliveryTracking.purchase_order_id == order_id
-            ).first()
+            ))
             if delivery_tracking:
                 delivery_tracking.status = DeliveryStatus.DELIVERED
                 delivery_tracking.actual_delivery_date = datetime.utcnow()
                 delivery_tracking.delivered_to = receive_data.received_by
+                self._record_delivery_status(delivery_tracking)
         
-        self.db.commit()
+        await self.db.commit()
+        invalidate_dashboard_cache()
         return True
 
     # Delivery Tracking Methods
-    def get_delivery_tracking(self, order_id: str):
-        """Get delivery tracking for a purchase order"""
-        return self.db.query(DeliveryTracking).filter(
-            DeliveryTracking.purchase_order_id == order_id
-        ).first()
+    async def get_delivery_tracking(self, order_id: str):
+        """Get delivery tracking for a purchase order, with its status events"""
+        return await self.db.scalar(_DELIVERY_TRACKING_BY_ORDER, {"order_id": order_id})
 
-    def update_delivery_tracking(self, order_id: str, tracking_data: DeliveryTrackingUpdate):
+    async def update_delivery_tracking(self, order_id: str, tracking_data: DeliveryTrackingUpdate):
         """Update delivery tracking"""
-        tracking = self.get_delivery_tracking(order_id)
+        tracking = await self.get_delivery_tracking(order_id)
         if not tracking:
             return None
         
+        previous_status = tracking.status
         update_dict = tracking_data.dict(exclude_unset=True)
         for field, value in update_dict.items():
             setattr(tracking, field, value)
         
+        if tracking.status != previous_status:
+            self._record_delivery_status(tracking)
+        
         tracking.last_status_update = datetime.utcnow()
         tracking.updated_at = datetime.utcnow()
         
         # Update purchase order status based on delivery status
-        purchase_order = self.get_purchase_order_by_id(order_id)
+        purchase_order = await self.get_purchase_order_by_id(order_id)
         if purchase_order and tracking.status == DeliveryStatus.DELIVERED:
             purchase_order.status = PurchaseOrderStatus.DELIVERED
             purchase_order.actual_delivery_date = tracking.actual_delivery_date
         elif purchase_order and tracking.status == DeliveryStatus.IN_TRANSIT:
             purchase_order.status = PurchaseOrderStatus.SHIPPED
         
-        self.db.commit()
-        self.db.refresh(tracking)
-        return tracking
+        await self.db.commit()
+        invalidate_dashboard_cache()
+        # Reload so the response includes the event recorded above
+        return await self.get_delivery_tracking(order_id)
+
+    def _record_delivery_status(self, tracking: DeliveryTracking):
+        """Append a status event row (never rewrites earlier history)"""
+        self.db.add(DeliveryStatusEvent(
+            tracking_id=tracking.id,
+            status=tracking.status,
+            location=tracking.current_location
+        ))
 
     # Dashboard/Summary Methods
-    def get_purchase_order_summary(self):
-        """Get purchase order summary for dashboard"""
-        total_orders = self.db.query(PurchaseOrder).count()
-        pending_orders = self.db.query(PurchaseOrder).filter(
-            PurchaseOrder.status.in_([PurchaseOrderStatus.PENDING, PurchaseOrderStatus.APPROVED])
-        ).count()
-        shipped_orders = self.db.query(PurchaseOrder).filter(
-            PurchaseOrder.status == PurchaseOrderStatus.SHIPPED
-        ).count()
-        delivered_orders = self.db.query(PurchaseOrder).filter(
-            PurchaseOrder.status == PurchaseOrderStatus.DELIVERED
-        ).count()
-        
-        # Calculate total value
-        total_value_result = self.db.query(
-            func.sum(PurchaseOrder.total_amount)
-        ).scalar() or 0.0
-        
-        pending_value_result = self.db.query(
-            func.sum(PurchaseOrder.total_amount)
-        ).filter(
-            PurchaseOrder.status.in_([PurchaseOrderStatus.PENDING, PurchaseOrderStatus.APPROVED])
-        ).scalar() or 0.0
+    def _delivery_days(self):
+        """
+        Whole days from order_date to actual_delivery_date as a SQL expression,
+        truncated like timedelta.days (date arithmetic is dialect specific)
+        """
+        if self.db.bind.dialect.name == "postgresql":
+            seconds = extract("epoch", PurchaseOrder.actual_delivery_date - PurchaseOrder.order_date)
+            return func.floor(seconds / 86400)
+        days = func.julianday(PurchaseOrder.actual_delivery_date) - func.julianday(PurchaseOrder.order_date)
+        return cast(days, Integer)
+
+    async def _count(self, model, *criteria) -> int:
+        """COUNT(*) of rows of model matching criteria"""
+        return await self.db.scalar(select(func.count()).select_from(model).where(*criteria))
+
+    async def get_purchase_order_summary(self):
+        """Get purchase order summary for dashboard (cached)"""
+        return await _cached("summary", self._load_purchase_order_summary)
+
+    async def _load_purchase_order_summary(self):
+        """Run the summary counters and totals as one aggregate over purchase_orders"""
+        pending = PurchaseOrder.status.in_([PurchaseOrderStatus.PENDING, PurchaseOrderStatus.APPROVED])
+        (
+            total_orders,
+            pending_orders,
+            shipped_orders,
+            delivered_orders,
+            total_value_result,
+            pending_value_result
+        ) = (await self.db.execute(
+            select(
+                func.count(),
+                func.count().filter(pending),
+                func.count().filter(PurchaseOrder.status == PurchaseOrderStatus.SHIPPED),
+                func.count().filter(PurchaseOrder.status == PurchaseOrderStatus.DELIVERED),
+                func.coalesce(func.sum(PurchaseOrder.total_amount), 0.0),
+                func.coalesce(func.sum(PurchaseOrder.total_amount).filter(pending), 0.0)
+            ).select_from(PurchaseOrder)
+        )).one()
         
         return PurchaseOrderSummary(
             total_orders=total_orders,
@@ -278,49 +390,63 @@ class PurchaseOrderService:
             pending_value=float(pending_value_result)
         )
 
-    def get_delivery_metrics(self):
-        """Get delivery metrics for dashboard"""
-        in_transit_count = self.db.query(DeliveryTracking).filter(
+    async def get_delivery_metrics(self):
+        """Get delivery metrics for dashboard (cached)"""
+        return await _cached("delivery_metrics", self._load_delivery_metrics)
+
+    async def _load_delivery_metrics(self):
+        """
+        Run the delivery metrics as one round trip: the delivery_tracking counts
+        cross joined with a one-row aggregate over purchase_orders
+        """
+        now = datetime.utcnow()
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        
+        # In transit and delivered today: each an index lookup (status, and a
+        # half-open range on the bare actual_delivery_date column) rather than
+        # a pass over every delivery ever tracked
+        in_transit_count = select(func.count()).select_from(DeliveryTracking).where(
             DeliveryTracking.status.in_([DeliveryStatus.IN_TRANSIT, DeliveryStatus.OUT_FOR_DELIVERY])
-        ).count()
-        
-        # Delivered today
-        today = datetime.utcnow().date()
-        delivered_today = self.db.query(DeliveryTracking).filter(
+        ).scalar_subquery()
+        delivered_today = select(func.count()).select_from(DeliveryTracking).where(
             and_(
                 DeliveryTracking.status == DeliveryStatus.DELIVERED,
-                func.date(DeliveryTracking.actual_delivery_date) == today
+                DeliveryTracking.actual_delivery_date >= today_start,
+                DeliveryTracking.actual_delivery_date < today_start + timedelta(days=1)
             )
-        ).count()
-        
-        # Delayed deliveries (past expected delivery date)
-        delayed_deliveries = self.db.query(PurchaseOrder).filter(
-            and_(
-                PurchaseOrder.expected_delivery_date < datetime.utcnow(),
+        ).scalar_subquery()
+        tracking = select(
+            in_transit_count.label("in_transit_count"),
+            delivered_today.label("delivered_today")
+        ).subquery()
+        
+        # Delayed deliveries (past expected delivery date) and average delivery time
+        orders = select(
+            func.count().filter(and_(
+                PurchaseOrder.expected_delivery_date < now,
                 PurchaseOrder.status.in_([
                     PurchaseOrderStatus.APPROVED, 
                     PurchaseOrderStatus.ORDERED, 
                     PurchaseOrderStatus.SHIPPED
                 ])
-            )
-        ).count()
-        
-        # Calculate average delivery time
-        delivered_orders = self.db.query(PurchaseOrder).filter(
-            and_(
-                PurchaseOrder.status == PurchaseOrderStatus.DELIVERED,
-                PurchaseOrder.actual_delivery_date.isnot(None)
-            )
-        ).all()
-        
-        if delivered_orders:
-            total_delivery_days = sum(
-                (order.actual_delivery_date - order.order_date).days
-                for order in delivered_orders
-            )
-            average_delivery_time = total_delivery_days / len(delivered_orders)
-        else:
-            average_delivery_time = 0.0
+            )).label("delayed_deliveries"),
+            func.coalesce(
+                func.avg(self._delivery_days()).filter(and_(
+                    PurchaseOrder.status == PurchaseOrderStatus.DELIVERED,
+                    PurchaseOrder.actual_delivery_date.isnot(None)
+                )),
+                0.0
+            ).label("average_delivery_time")
+        ).select_from(PurchaseOrder).subquery()
+        
+        (
+            in_transit_count,
+            delivered_today,
+            delayed_deliveries,
+            average_delivery_time
+        ) = (await self.db.execute(
+            select(tracking, orders).select_from(tracking.join(orders, true()))
+        )).one()
         
         return DeliveryMetrics(
             in_transit_count=in_transit_count,
@@ -329,56 +455,83 @@ class PurchaseOrderService:
             average_delivery_time=average_delivery_time
         )
 
-    def get_reorder_suggestions(self, limit: int = 10):
-        """Get products that need reordering based on stock levels"""
-        low_stock_products = self.db.query(Product).filter(
-            Product.quantity_in_stock <= Product.min_stock_threshold,
-            Product.is_active == True
-        ).limit(limit).all()
-        
-        suggestions = []
-        for product in low_stock_products:
-            # Find preferred supplier for this product
-            supplier_product = self.db.query(SupplierProduct).filter(
-                and_(
-                    SupplierProduct.product_id == product.id,
-                    SupplierProduct.is_available == True
+    async def get_reorder_suggestions(self, limit: int = 10):
+        """Get products that need reordering based on stock levels (cached per limit)"""
+        return await _cached(f"reorder:{limit}", lambda: self._load_reorder_suggestions(limit))
+
+    async def _load_reorder_suggestions(self, limit: int):
+        """Build reorder suggestions from current stock levels"""
+        # Same predicate as ix_products_reorder, so the partial index serves it in order
+        low_stock_products = (await self.db.scalars(
+            select(Product).where(REORDER_CANDIDATE).order_by(Product.quantity_in_stock).limit(limit)
+        )).all()
+        
+        # Available suppliers for all candidates in one joined query; per product,
+        # the first row (preferred first) is the one suggested
+        product_suppliers = {}
+        if low_stock_products:
+            supplier_rows = await self.db.execute(
+                select(
+                    SupplierProduct.product_id,
+                    Supplier.id,
+                    Supplier.name,
+                    SupplierProduct.supplier_price,
+                    SupplierProduct.minimum_order_quantity,
+                    SupplierProduct.lead_time_days
                 )
-            ).order_by(SupplierProduct.is_preferred.desc()).first()
-            
-            suggestion = {
+                .join(Supplier, Supplier.id == SupplierProduct.supplier_id)
+                .where(
+                    and_(
+                        SupplierProduct.product_id.in_([product.id for product in low_stock_products]),
+                        SupplierProduct.is_available == True
+                    )
+                )
+                .order_by(SupplierProduct.product_id, SupplierProduct.is_preferred.desc())
+            )
+            for product_id, supplier_id, name, price, minimum_order, lead_time in supplier_rows:
+                product_suppliers.setdefault(product_id, {
+                    "id": supplier_id,
+                    "name": name,
+                    "price": price,
+                    "minimum_order": minimum_order,
+                    "lead_time": lead_time
+                })
+        
+        suggestions = [
+            {
                 "product_id": product.id,
                 "product_name": product.name,
                 "product_sku": product.sku,
                 "current_stock": product.quantity_in_stock,
                 "min_threshold": product.min_stock_threshold,
                 "suggested_quantity": max(product.max_stock_threshold or 100, product.min_stock_threshold * 3),
-                "supplier": None
+                "supplier": product_suppliers.get(product.id)
             }
-            
-            if supplier_product:
-                supplier = self.get_supplier_by_id(supplier_product.supplier_id)
-                suggestion["supplier"] = {
-                    "id": supplier.id,
-                    "name": supplier.name,
-                    "price": supplier_product.supplier_price,
-                    "minimum_order": supplier_product.minimum_order_quantity,
-                    "lead_time": supplier_product.lead_time_days
-                }
-            
-            suggestions.append(suggestion)
+            for product in low_stock_products
+        ]
         
         return {"suggestions": suggestions, "total_count": len(suggestions)}
 
-    def _generate_order_number(self):
-        """Generate a unique order number"""
-        today = datetime.utcnow()
-        date_prefix = today.strftime("%Y%m%d")
-        
-        # Count orders created today
-        orders_today = self.db.query(PurchaseOrder).filter(
-            func.date(PurchaseOrder.created_at) == today.date()
-        ).count()
-        
-        sequence = str(orders_today + 1).zfill(3)
-        return f"PO-{date_prefix}-{sequence}" 
\ No newline at end of file
+    async def _generate_order_number(self):
+        """
+        Generate a unique order number. Today's counter row is incremented with
+        INSERT ... ON CONFLICT DO UPDATE ... RETURNING: one keyed write instead of
+        counting today's orders, and concurrent creates cannot draw the same number.
+        """
+        date_prefix = datetime.utcnow().strftime("%Y%m%d")
+        
+        dialect = postgresql if self.db.bind.dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(PurchaseOrderCounter).values(day=date_prefix, last=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PurchaseOrderCounter.day],
+            set_={"last": PurchaseOrderCounter.last + 1}
+        ).returning(PurchaseOrderCounter.last)
+        
+        sequence = str(await self.db.scalar(stmt)).zfill(3)
+        return f"PO-{date_prefix}-{sequence}"
+
+def get_purchase_order_service(db: AsyncSession = Depends(get_async_db)) -> PurchaseOrderService:
+    """
+    FastAPI dependency: one PurchaseOrderService bound to the request's async session
+    """
+    return PurchaseOrderService(db)
@@ -1,14 +1,84 @@
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
-from argon2 import PasswordHasher
+from argon2 import PasswordHasher, Type
 from argon2.exceptions import VerifyMismatchError
+from models.product import generate_id
 from models.user import User
-from typing import Optional
-import uuid
+from typing import NamedTuple, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime
+import os
+import threading
+import time
+
+# Argon2id, defaulting to the OWASP baseline (19 MiB, 2 passes, 1 lane): memory-hard
+# but a few ms per login instead of tens. Deployments can pin the cost to their own
+# latency budget; hashes made with other parameters are upgraded on login.
+password_hasher = PasswordHasher(
+    time_cost=int(os.getenv("ARGON2_TIME_COST", "2")),
+    memory_cost=int(os.getenv("ARGON2_MEMORY_COST_KIB", "19456")),
+    parallelism=int(os.getenv("ARGON2_PARALLELISM", "1")),
+    hash_len=32,
+    type=Type.ID
+)
+
+# Development login seeded at startup
+DEFAULT_ADMIN_EMAIL = "admin@test.com"
+DEFAULT_ADMIN_PASSWORD = "admin123"
+
+def normalize_email(email: str) -> str:
+    """Canonical stored form of an email address (the users table CHECKs it is lower case)"""
+    return email.strip().casefold()
+
+class UserRow(NamedTuple):
+    """Read-only user columns, as returned by the cached lookups"""
+    id: str
+    email: str
+    password_hash: str
+    is_active: bool
+    is_admin: bool
+    created_at: Optional[datetime]
+
+USER_ROW_COLUMNS = (
+    User.id, User.email, User.password_hash, User.is_active, User.is_admin, User.created_at
+)
+
+# Columns update_user may write. The id and timestamps are managed here, and email
+# and password_hash are not raw fields: they need normalizing, hashing and checks.
+USER_UPDATABLE_COLUMNS = frozenset({"is_active", "is_admin"})
+
+# Users are read on every login and /me but rarely change: keep recent rows per
+# process, keyed by ("email", email) and ("id", id). Writes through this service
+# clear the cache; the TTL bounds staleness from writes made by other processes.
+USER_CACHE_TTL_SECONDS = 60
+USER_CACHE_MAXSIZE = 4096
+# Lookups that found no user are cached briefly too, so repeated logins for unknown
+# emails (credential stuffing) stop reaching the database; short, because another
+# process may create that user meanwhile
+USER_MISS_TTL_SECONDS = 10
+_user_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_user_cache_lock = threading.Lock()  # logins read it from worker threads
+
+def invalidate_user_cache():
+    with _user_cache_lock:
+        _user_cache.clear()
+
+# Logins for unknown or inactive users still verify against this hash, so the
+# response takes as long as a wrong password and does not reveal which emails
+# have accounts. Hashed on first use rather than at import.
+_dummy_password_hash: Optional[str] = None
+
+def _get_dummy_password_hash() -> str:
+    global _dummy_password_hash
+    if _dummy_password_hash is None:
+        _dummy_password_hash = password_hasher.hash(os.urandom(16).hex())
+    return _dummy_password_hash
 
 class UserService:
     def __init__(self, db: Session):
         self.db = db
-        self.ph = PasswordHasher()
+        self.ph = password_hasher
     
     def create_user(self, email: str, password: str, is_admin: bool = False) -> User:
         """Create a new user with hashed password"""
@@ -22,8 +92,8 @@ class UserService:
         
         # Create new user
         user = User(
-            id=str(uuid.uuid4()),
-            email=email.lower().strip(),
+            id=generate_id(),
+            email=normalize_email(email),
             password_hash=password_hash,
             is_admin=is_admin
         )
@@ -31,16 +101,36 @@ class UserService:
         self.db.add(user)
         self.db.commit()
         self.db.refresh(user)
+        invalidate_user_cache()
+        
+        return user
+    
+    def _get_cached_row(self, key: tuple, condition) -> Optional[UserRow]:
+        """Return the user row for key, selecting plain columns on a cache miss"""
+        with _user_cache_lock:
+            entry = _user_cache.get(key)
+            if entry is not None and entry[0] > time.time():
+                _user_cache.move_to_end(key)
+                return entry[1]
         
+        row = self.db.execute(select(*USER_ROW_COLUMNS).where(condition)).first()
+        user = UserRow(*row) if row is not None else None
+        ttl = USER_CACHE_TTL_SECONDS if user is not None else USER_MISS_TTL_SECONDS
+        with _user_cache_lock:
+            _user_cache[key] = (time.time() + ttl, user)
+            _user_cache.move_to_end(key)
+            if len(_user_cache) > USER_CACHE_MAXSIZE:
+                _user_cache.popitem(last=False)
         return user
     
-    def get_user_by_email(self, email: str) -> Optional[User]:
-        """Get user by email address"""
-        return self.db.query(User).filter(User.email == email.lower().strip()).first()
+    def get_user_by_email(self, email: str) -> Optional[UserRow]:
+        """Get user by email address (read-only, cached)"""
+        email = normalize_email(email)
+        return self._get_cached_row(("email", email), User.email == email)
     
-    def get_user_by_id(self, user_id: str) -> Optional[User]:
-        """Get user by ID"""
-        return self.db.query(User).filter(User.id == user_id).first()
+    def get_user_by_id(self, user_id: str) -> Optional[UserRow]:
+        """Get user by ID (read-only, cached)"""
+        return self._get_cached_row(("id", user_id), User.id == user_id)
     
     def verify_password(self, plain_password: str, password_hash: str) -> bool:
         """Verify password against hash"""
@@ -50,52 +140,88 @@ class UserService:
         except VerifyMismatchError:
             return False
     
-    def authenticate_user(self, email: str, password: str) -> Optional[User]:
+    def authenticate_user(self, email: str, password: str) -> Optional[UserRow]:
         """Authenticate user with email and password"""
         user = self.get_user_by_email(email)
         if not user or not user.is_active:
+            self.verify_password(password, _get_dummy_password_hash())
             return None
         
         if not self.verify_password(password, user.password_hash):
             return None
         
+        if self.ph.check_needs_rehash(user.password_hash):
+            self.db.execute(
+                update(User)
+                .where(User.id == user.id)
+                .values(password_hash=self.ph.hash(password))
+            )
+            self.db.commit()
+            invalidate_user_cache()
+        
         return user
     
-    def update_user(self, user_id: str, **updates) -> Optional[User]:
-        """Update user information"""
-        user = self.get_user_by_id(user_id)
-        if not user:
-            return None
-        
-        for key, value in updates.items():
-            if hasattr(user, key):
-                setattr(user, key, value)
+    def update_user(self, user_id: str, **updates) -> Optional[UserRow]:
+        """Update user information in one UPDATE ... RETURNING (unknown fields are ignored)"""
+        values = {key: value for key, value in updates.items() if key in USER_UPDATABLE_COLUMNS}
+        if not values:
+            return self.get_user_by_id(user_id)
         
+        row = self.db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(**values)
+            .returning(*USER_ROW_COLUMNS)
+        ).first()
         self.db.commit()
-        self.db.refresh(user)
-        return user
+        invalidate_user_cache()
+        return UserRow(*row) if row is not None else None
     
     def deactivate_user(self, user_id: str) -> bool:
         """Deactivate a user account"""
-        user = self.get_user_by_id(user_id)
-        if not user:
-            return False
-        
-        user.is_active = False
+        row = self.db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(is_active=False)
+            .returning(User.id)
+        ).first()
         self.db.commit()
-        return True
+        invalidate_user_cache()
+        return row is not None
     
-    def get_all_users(self, skip: int = 0, limit: int = 100) -> list[User]:
-        """Get all users with pagination"""
-        return self.db.query(User).offset(skip).limit(limit).all()
+    def get_all_users(
+        self, skip: int = 0, limit: int = 100, after_id: Optional[str] = None
+    ) -> list[UserRow]:
+        """Get all users with pagination, as plain rows ordered by id.
+        Pass the last id seen as after_id to page by key instead of OFFSET."""
+        stmt = select(*USER_ROW_COLUMNS).order_by(User.id).limit(limit)
+        if after_id is not None:
+            stmt = stmt.where(User.id > after_id)
+        else:
+            stmt = stmt.offset(skip)
+        return [UserRow(*row) for row in self.db.execute(stmt)]
     
-    def create_default_admin(self) -> User:
-        """Create default admin user if none exists"""
-        admin = self.get_user_by_email("admin@test.com")
-        if not admin:
-            admin = self.create_user(
-                email="admin@test.com",
-                password="admin123",
+    def create_default_admin(self) -> Tuple[UserRow, bool]:
+        """Create default admin user if none exists; returns (admin, created)"""
+        admin = self.get_user_by_email(DEFAULT_ADMIN_EMAIL)
+        if admin:
+            return admin, False
+        
+        # Workers starting together may all get here: one INSERT wins, the rest
+        # do nothing, so no IntegrityError aborts startup
+        dialect = postgresql if self.db.bind.dialect.name == "postgresql" else sqlite
+        inserted_id = self.db.scalar(
+            dialect.insert(User)
+            .values(
+                id=generate_id(),
+                email=DEFAULT_ADMIN_EMAIL,
+                password_hash=self.ph.hash(DEFAULT_ADMIN_PASSWORD),
                 is_admin=True
             )
-        return admin 
\ No newline at end of file
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.id)
+        )
+        self.db.commit()
+        # The lookup above cached the miss; drop it so the re-read sees the new row
+        invalidate_user_cache()
+        return self.get_user_by_email(DEFAULT_ADMIN_EMAIL), inserted_id is not None
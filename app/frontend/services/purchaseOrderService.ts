@@ -79,6 +79,12 @@ export interface CreatePurchaseOrderData {
   }[];
 }
 
+export interface DeliveryStatusEvent {
+  status: DeliveryTracking['status'];
+  location?: string;
+  created_at: string;
+}
+
 export interface DeliveryTracking {
   id: string;
   purchase_order_id: string;
@@ -97,6 +103,7 @@ export interface DeliveryTracking {
   delivery_notes?: string;
   last_status_update: string;
   status_history?: string;
+  events?: DeliveryStatusEvent[];
   created_at: string;
   updated_at: string;
 }
@@ -65,13 +65,8 @@ def start_server(python_exe):
     
     # Start the server using uvicorn
     try:
-        subprocess.run([
-            str(python_exe), '-m', 'uvicorn',
-            'main:app',
-            '--host', '0.0.0.0',
-            '--port', '8000',
-            '--reload'
-        ], check=True)
+        # serve.py picks reload or multi-worker mode from APP_ENV
+        subprocess.run([str(python_exe), 'serve.py'], check=True)
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
     except subprocess.CalledProcessError as e:
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Full Setup Script for Inventory Management System
+Sets up the backend virtual environment and the frontend node_modules at the
+same time: both installs are network-bound, so they overlap instead of queueing.
+"""
+
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import setup_backend
+
+def install_frontend():
+    """Install npm dependencies exactly as locked in package-lock.json"""
+    frontend_dir = Path("app/frontend").resolve()
+
+    if (frontend_dir / "node_modules").exists():
+        print("✅ Frontend dependencies already installed")
+        return
+
+    print("📦 Installing frontend dependencies...")
+    subprocess.run(['npm', 'ci', '--prefer-offline'], cwd=frontend_dir, check=True)
+    print("✅ Frontend dependencies installed successfully")
+
+def install_backend():
+    """Create the backend virtual environment and install its requirements"""
+    python_313 = setup_backend.check_python_version()
+    venv_path = setup_backend.setup_virtual_environment()
+    setup_backend.install_dependencies(venv_path, python_313)
+    setup_backend.create_env_file()
+    return venv_path
+
+def main():
+    """Main setup function"""
+    print("🚀 Setting up Inventory Management System (backend + frontend)")
+    print("=" * 50)
+
+    try:
+        subprocess.run(['node', '--version'], capture_output=True, check=True)
+    except (FileNotFoundError, subprocess.CalledProcessError):
+        print("❌ Node.js is not installed")
+        print("Please install Node.js from: https://nodejs.org/")
+        sys.exit(1)
+
+    # Output from the two installs interleaves; each step is still labelled
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        backend = executor.submit(install_backend)
+        frontend = executor.submit(install_frontend)
+        venv_path = backend.result()
+        frontend.result()
+
+    success = setup_backend.test_installation(venv_path)
+
+    print("\n" + "=" * 50)
+    if success:
+        print("✅ Setup completed successfully!")
+    else:
+        print("⚠️  Setup completed with warnings")
+    print("\n📋 Next steps:")
+    print("1. Run: python run_backend.py")
+    print("2. In another terminal run: python start_frontend.py")
+    print("3. Open: http://localhost:3000")
+
+if __name__ == "__main__":
+    main()
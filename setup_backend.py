@@ -10,20 +10,23 @@ import subprocess
 import platform
 from pathlib import Path
 
-def run_command(cmd, cwd=None, check=True):
-    """Run a command and return the result"""
-    print(f"🔄 Running: {cmd}")
+# Shared pip cache in the repository: downloaded and locally built wheels
+# (argon2-cffi-bindings, psycopg2) are reused by every later venv bootstrap
+PIP_CACHE_DIR = Path(__file__).resolve().parent / ".pip-cache"
+
+def run_command(cmd, cwd=None, check=True, env=None, quiet=False):
+    """
+    Run a command given as an argument list (no shell, so paths need no quoting)
+    and return the result. Output streams straight to the terminal unless quiet.
+    """
+    cmd = [str(arg) for arg in cmd]
+    print(f"🔄 Running: {subprocess.list2cmdline(cmd)}")
+    output = subprocess.DEVNULL if quiet else None
     try:
-        result = subprocess.run(cmd, shell=True, check=check, cwd=cwd, 
-                              capture_output=True, text=True)
-        if result.stdout:
-            print(result.stdout.strip())
-        return result
+        return subprocess.run(cmd, check=check, cwd=cwd, env=env, stdout=output, stderr=output)
     except subprocess.CalledProcessError as e:
-        print(f"❌ Error running command: {cmd}")
+        print(f"❌ Error running command: {subprocess.list2cmdline(cmd)}")
         print(f"Error: {e}")
-        if e.stderr:
-            print(f"Error output: {e.stderr}")
         if check:
             sys.exit(1)
         return e
@@ -55,7 +58,7 @@ def setup_virtual_environment():
     # Create virtual environment
     if not venv_path.exists():
         print("📦 Creating virtual environment...")
-        run_command(f'"{sys.executable}" -m venv "{venv_path}"')
+        run_command([sys.executable, "-m", "venv", venv_path])
     else:
         print("✅ Virtual environment already exists")
     
@@ -85,13 +88,18 @@ def install_dependencies(venv_path, python_313=False):
         print(f"❌ Python executable not found: {python_exe}")
         sys.exit(1)
     
+    # Every pip call below (and any subprocess it spawns) inherits the cache
+    os.environ.setdefault("PIP_CACHE_DIR", str(PIP_CACHE_DIR))
+    
     # Upgrade pip first
     print("📦 Upgrading pip...")
-    run_command(f'"{python_exe}" -m pip install --upgrade pip', cwd=backend_dir)
+    run_command([python_exe, "-m", "pip", "install", "--upgrade", "pip"], cwd=backend_dir)
     
     # Install core dependencies
     print("📦 Installing core dependencies...")
-    run_command(f'"{python_exe}" -m pip install -r requirements.txt', cwd=backend_dir)
+    # Prefer wheels over source builds (argon2, psycopg2); the native argon2 build opts back in
+    run_command([python_exe, "-m", "pip", "install", "--prefer-binary", "-r", "requirements.txt"], cwd=backend_dir)
+    install_native_argon2(python_exe, backend_dir)
     
     # Handle PostgreSQL dependencies for Python 3.13
     if python_313:
@@ -101,7 +109,7 @@ def install_dependencies(venv_path, python_313=False):
         
         # Try to install a compatible psycopg2 version
         print("\n🔄 Attempting to install PostgreSQL support...")
-        result = run_command(f'"{python_exe}" -m pip install psycopg2-binary==2.9.7', 
+        result = run_command([python_exe, "-m", "pip", "install", "psycopg2-binary==2.9.7"],
                            cwd=backend_dir, check=False)
         
         if result.returncode != 0:
@@ -113,6 +121,69 @@ def install_dependencies(venv_path, python_313=False):
         else:
             print("✅ PostgreSQL driver installed successfully!")
 
+def detect_argon2_cflags():
+    """
+    Compiler flags for a vectorized libargon2 build on this CPU, or None when
+    the CPU (or platform) gains nothing over the prebuilt wheel
+    """
+    if platform.system() != "Linux" or platform.machine() not in ("x86_64", "AMD64"):
+        return None
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            flags = next(
+                (line.split(":", 1)[1].split() for line in cpuinfo if line.startswith("flags")),
+                []
+            )
+    except OSError:
+        return None
+    
+    # Prefer AVX-512, fall back to AVX2: the optimized BLAMKA rounds use the widest
+    # vector unit the compiler is allowed to target
+    if "avx512f" in flags:
+        return "-O3 -mavx2 -mavx512f"
+    if "avx2" in flags:
+        return "-O3 -mavx2"
+    return None
+
+def install_native_argon2(python_exe, backend_dir):
+    """
+    Rebuild argon2-cffi-bindings from source against this CPU's vector extensions
+    (opt.c instead of the portable reference rounds). Opt-in via ARGON2_NATIVE_BUILD=1:
+    the result is tied to this CPU and must not be copied to older hardware.
+    """
+    if os.getenv("ARGON2_NATIVE_BUILD") != "1":
+        return
+    
+    cflags = detect_argon2_cflags()
+    if not cflags:
+        print("⚠️  No AVX2/AVX-512 support detected - keeping the prebuilt argon2 wheel")
+        return
+    
+    print(f"🔧 Building argon2-cffi-bindings with CFLAGS=\"{cflags}\"...")
+    reinstall_wheel = [
+        python_exe, "-m", "pip", "install", "--force-reinstall", "--no-deps", "argon2-cffi-bindings"
+    ]
+    result = run_command(
+        reinstall_wheel[:-1] + ["--no-binary", "argon2-cffi-bindings", "argon2-cffi-bindings"],
+        cwd=backend_dir, check=False,
+        env={**os.environ, "CFLAGS": cflags, "ARGON2_CFFI_USE_SSE2": "1"}
+    )
+    if result.returncode != 0:
+        print("⚠️  Native argon2 build failed - reinstalling the prebuilt wheel")
+        run_command(reinstall_wheel, cwd=backend_dir, check=False)
+        return
+    
+    # A hash round trip proves the build runs on this CPU (no illegal instruction)
+    check = run_command(
+        [python_exe, "-c", "import argon2; ph = argon2.PasswordHasher(); ph.verify(ph.hash('x'), 'x')"],
+        cwd=backend_dir, check=False, quiet=True
+    )
+    if check.returncode == 0:
+        print("✅ Native argon2 build installed")
+    else:
+        print("⚠️  Native argon2 build does not run here - reinstalling the prebuilt wheel")
+        run_command(reinstall_wheel, cwd=backend_dir, check=False)
+
 def create_env_file():
     """Create environment file if it doesn't exist"""
     backend_dir = Path("app/backend").resolve()
@@ -139,7 +210,7 @@ def test_installation(venv_path):
     print("\n🧪 Testing installation...")
     
     # Test basic imports
-    test_cmd = f'"{python_exe}" -c "import fastapi, sqlalchemy, uvicorn; print(\'✅ Core dependencies OK\')"'
+    test_cmd = [python_exe, "-c", "import fastapi, sqlalchemy, uvicorn; print('✅ Core dependencies OK')"]
     result = run_command(test_cmd, cwd=backend_dir, check=False)
     
     if result.returncode != 0:
@@ -147,7 +218,7 @@ def test_installation(venv_path):
         return False
     
     # Test database connection
-    test_cmd = f'"{python_exe}" -c "from database.connection import test_db_connection; test_db_connection()"'
+    test_cmd = [python_exe, "-c", "from database.connection import test_db_connection; test_db_connection()"]
     result = run_command(test_cmd, cwd=backend_dir, check=False)
     
     return result.returncode == 0
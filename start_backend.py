@@ -8,6 +8,7 @@ import os
 import sys
 import subprocess
 import sqlite3
+from importlib.metadata import PackageNotFoundError, distribution
 from pathlib import Path
 
 def setup_environment():
@@ -17,7 +18,7 @@ def setup_environment():
     os.environ['JWT_SECRET_KEY'] = 'dev-secret-key-change-in-production-123456789'
     os.environ['JWT_ALGORITHM'] = 'HS256'
     os.environ['JWT_EXPIRE_MINUTES'] = '30'
-    os.environ['APP_ENV'] = 'development'
+    os.environ.setdefault('APP_ENV', 'development')  # APP_ENV=production runs workers instead of --reload
     os.environ['DEBUG'] = 'True'
     
     print("✅ Environment variables configured")
@@ -28,16 +29,20 @@ def check_dependencies():
         'fastapi', 'uvicorn', 'sqlalchemy', 'pydantic', 'python-dotenv'
     ]
     
+    # Look up installed distributions by name instead of importing them: no
+    # module is loaded, and pip names like python-dotenv resolve correctly
     missing_packages = []
     for package in required_packages:
         try:
-            __import__(package)
-        except ImportError:
+            distribution(package)
+        except PackageNotFoundError:
             missing_packages.append(package)
     
     if missing_packages:
         print(f"❌ Missing packages: {missing_packages}")
         print("Installing missing packages...")
+        # Same repository pip cache as setup_backend.py
+        os.environ.setdefault('PIP_CACHE_DIR', str(Path(__file__).resolve().parent / '.pip-cache'))
         subprocess.check_call([
             sys.executable, '-m', 'pip', 'install', 
             'fastapi', 'uvicorn[standard]', 'sqlalchemy', 'pydantic', 
@@ -51,8 +56,10 @@ def create_sqlite_db():
     """Create SQLite database if it doesn't exist"""
     db_path = Path('./app/backend/inventory.db')
     if not db_path.exists():
-        # Create empty database
+        # Create empty database already in WAL mode (the journal mode persists in
+        # the file; per-connection PRAGMAs are applied by the app's engine)
         conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.close()
         print("✅ SQLite database created")
     else:
@@ -68,13 +75,8 @@ def start_server():
     print("\n" + "="*50)
     
     # Start uvicorn server
-    subprocess.run([
-        sys.executable, '-m', 'uvicorn', 
-        'main:app', 
-        '--host', '0.0.0.0', 
-        '--port', '8000', 
-        '--reload'
-    ])
+    # serve.py picks reload or multi-worker mode from APP_ENV
+    subprocess.run([sys.executable, 'serve.py'])
 
 if __name__ == "__main__":
     print("🔧 Setting up Inventory Management Backend...")
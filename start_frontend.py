@@ -28,7 +28,7 @@ def install_dependencies():
     # Check if node_modules exists
     if not Path('./node_modules').exists():
         print("Installing npm packages...")
-        subprocess.run(['npm', 'install'], check=True)
+        subprocess.run(['npm', 'ci', '--prefer-offline'], check=True)  # Exactly as locked
         print("✅ Dependencies installed successfully")
     else:
         print("✅ Dependencies already installed")